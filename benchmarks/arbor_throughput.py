@@ -0,0 +1,44 @@
+"""
+    Compare the throughput of a population of unconnected cells on NEURON and on Arbor.
+
+    Usage: python benchmarks/arbor_throughput.py <Cell> <catalogue> [n=100] [duration=100]
+"""
+import os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import dbbs_models
+from dbbs_models.arbor_export import to_arbor, global_properties, PopulationRecipe
+from patch import p
+import arbor
+from arbor import units as U
+
+def neuron_throughput(model, n, duration, dt=0.025):
+    cells = [model() for _ in range(n)]
+    p.cvode.active(0)
+    p.dt = dt
+    p.celsius = 32
+    start = time.perf_counter()
+    p.finitialize(-70)
+    p.continuerun(duration)
+    return time.perf_counter() - start
+
+def arbor_throughput(model, catalogue, n, duration, dt=0.025):
+    recipe = PopulationRecipe(to_arbor(model, v_init=-70, celsius=32), global_properties(model, catalogue), n)
+    context = arbor.context(threads=os.cpu_count())
+    sim = arbor.simulation(recipe, context, arbor.partition_load_balance(recipe, context))
+    start = time.perf_counter()
+    sim.run(duration * U.ms, dt * U.ms)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    model = dbbs_models.__dict__[sys.argv[1]]
+    catalogue = sys.argv[2]
+    kwargs = {a.split('=')[0]: eval(a.split('=')[1]) for a in sys.argv[3:]}
+    n = kwargs.get("n", 100)
+    duration = kwargs.get("duration", 100)
+    results = {}
+    for backend, wall in (
+        ("arbor", arbor_throughput(model, catalogue, n, duration)),
+        ("neuron", neuron_throughput(model, n, duration)),
+    ):
+        results[backend] = {"wall": wall, "cell_ms_per_s": n * duration / wall}
+    sys.stdout.write(repr(results))
@@ -0,0 +1,36 @@
+"""
+    Compare the throughput of a population of unconnected cells on the classic NEURON
+    engine and on CoreNEURON. Each engine is benchmarked in its own process.
+
+    Usage: python benchmarks/coreneuron_throughput.py <Cell> [n=100] [duration=100]
+"""
+import os, sys, time, subprocess
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+def throughput(model, n, duration, coreneuron):
+    from dbbs_models.coreneuron import run
+
+    cells = [model() for _ in range(n)]
+    start = time.perf_counter()
+    run(cells, duration, coreneuron=coreneuron)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    kwargs = {a.split('=')[0]: eval(a.split('=')[1]) for a in sys.argv[2:]}
+    n = kwargs.get("n", 100)
+    duration = kwargs.get("duration", 100)
+    if "coreneuron" in kwargs:
+        import dbbs_models
+
+        wall = throughput(dbbs_models.__dict__[sys.argv[1]], n, duration, kwargs["coreneuron"])
+        sys.stdout.write("\n" + repr(wall))
+        exit()
+    from dbbs_models.coreneuron import compatibility_report
+    import dbbs_models
+
+    results = {"compatibility": compatibility_report(dbbs_models.__dict__[sys.argv[1]])}
+    for engine, flag in (("neuron", False), ("coreneuron", True)):
+        out = subprocess.check_output([sys.executable, __file__, *sys.argv[1:], "coreneuron={}".format(flag)])
+        wall = float(out.decode("utf-8").split("\n")[-1])
+        results[engine] = {"wall": wall, "cell_ms_per_s": n * duration / wall}
+    sys.stdout.write(repr(results))
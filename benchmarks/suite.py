@@ -0,0 +1,78 @@
+"""
+    Benchmark every cell model exported by ``dbbs_models`` and store the results as JSON.
+    Each model is benchmarked in its own process.
+
+    Usage:
+      python benchmarks/suite.py [results.json] [duration=100] [dt=0.025]
+      python benchmarks/suite.py compare <old.json> <new.json>
+
+    Results are written to ``benchmarks/results/<version>.json`` by default.
+"""
+import os, sys, json, subprocess, platform
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import dbbs_models
+from arborize import NeuronModel
+
+# Measurements where a higher value is better.
+_throughputs = ("fixed_step", "cvode")
+
+def model_names():
+    return [
+        name for name, obj in vars(dbbs_models).items()
+        if isinstance(obj, type) and issubclass(obj, NeuronModel)
+    ]
+
+def run_model(name, **kwargs):
+    try:
+        out = subprocess.check_output(
+            [sys.executable, __file__, "model", name, *["{}={}".format(k, repr(v)) for k, v in kwargs.items()]],
+            stderr=subprocess.PIPE,
+        ).decode("utf-8")
+    except subprocess.CalledProcessError as e:
+        return {"error": e.stderr.decode("utf-8").strip().split("\n")[-1]}
+    return eval(out.split("\n")[-1])
+
+def run_suite(path=None, **kwargs):
+    from patch import p
+
+    if path is None:
+        path = os.path.join(os.path.dirname(__file__), "results", dbbs_models.__version__ + ".json")
+    results = {
+        "version": dbbs_models.__version__,
+        "neuron": p.nrnversion(),
+        "python": platform.python_version(),
+        "settings": kwargs,
+        "models": {name: run_model(name, **kwargs) for name in model_names()},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    return path
+
+def compare(old_path, new_path):
+    with open(old_path, "r") as f:
+        old = json.load(f)
+    with open(new_path, "r") as f:
+        new = json.load(f)
+    print("{} -> {}".format(old["version"], new["version"]))
+    for name, new_results in sorted(new["models"].items()):
+        old_results = old["models"].get(name, {})
+        for key, value in sorted(new_results.items()):
+            if not isinstance(value, (int, float)) or not old_results.get(key):
+                continue
+            change = (value - old_results[key]) / old_results[key] * 100
+            worse = change < 0 if key in _throughputs else change > 0
+            flag = " !" if worse and abs(change) > 10 else ""
+            print("{:<14} {:<18} {:>12.4g} {:>12.4g} {:>+8.1f}%{}".format(name, key, old_results[key], value, change, flag))
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if "=" not in a]
+    kwargs = {a.split('=')[0]: eval(a.split('=')[1]) for a in sys.argv[1:] if "=" in a}
+    if args[:1] == ["model"]:
+        from dbbs_models.benchmark import benchmark_model
+
+        sys.stdout.write("\n" + repr(benchmark_model(dbbs_models.__dict__[args[1]], **kwargs)))
+    elif args[:1] == ["compare"]:
+        compare(args[1], args[2])
+    else:
+        print(run_suite(*args, **kwargs))
@@ -0,0 +1,121 @@
+"""
+    Spike detection and firing features for many voltage traces at once.
+
+    The traces are the rows of a 2D array on a common time base. A spike is a period
+    above ``threshold`` that starts and ends within the analysed interval; its peak is the
+    maximum of that period. All traces are processed together with array operations, so
+    no Python loop runs per trace or per spike.
+"""
+
+import numpy as np
+
+def detect_spikes(t, traces, threshold=-20., start=None, end=None):
+    """
+        Find the peaks of the spikes in a set of traces.
+
+        :param t: Time points of the traces in ms.
+        :type t: 1D array
+        :param traces: Voltage traces in mV, one per row.
+        :type traces: 2D array
+        :param threshold: Voltage threshold of a spike.
+        :param start: Start of the analysed interval, defaults to the first time point.
+        :param end: End of the analysed interval, defaults to the last time point.
+        :returns: The trace index and time index of each peak, ordered by trace and time.
+        :rtype: tuple of 1D arrays
+    """
+    first = _first_index(np.asarray(t, dtype=float), start)
+    t, traces = _window(t, traces, start, end)
+    above = traces >= threshold
+    crossings = np.diff(above.astype(np.int8), axis=1)
+    up_rows, ups = np.nonzero(crossings == 1)
+    down_rows, downs = np.nonzero(crossings == -1)
+    # Pair each upward crossing with the first downward crossing after it in its trace.
+    # Downward crossings that precede the first upward crossing of a trace are skipped.
+    n = traces.shape[1]
+    up_keys = up_rows * n + ups
+    down_keys = down_rows * n + downs
+    match = np.searchsorted(down_keys, up_keys)
+    complete = match < len(down_keys)
+    complete[complete] = down_rows[match[complete]] == up_rows[complete]
+    rows = up_rows[complete]
+    begins = ups[complete] + 1
+    ends = downs[match[complete]] + 1
+    # Peak of each spike: the maximum over its samples, found by sorting the samples of
+    # all spikes by spike and value.
+    lengths = ends - begins
+    spike_ids = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    columns = np.repeat(begins, lengths) + offsets
+    values = traces[rows[spike_ids], columns]
+    order = np.lexsort((values, spike_ids))
+    last = np.cumsum(lengths) - 1
+    peaks = columns[order[last]]
+    return rows, peaks + first
+
+def spike_features(t, traces, threshold=-20., start=None, end=None, onset_slope=10.):
+    """
+        Compute the firing features of a set of traces.
+
+        :param t: Time points of the traces in ms.
+        :type t: 1D array
+        :param traces: Voltage traces in mV, one per row.
+        :type traces: 2D array
+        :param threshold: Voltage threshold of a spike.
+        :param start: Start of the analysed interval, defaults to the first time point.
+        :param end: End of the analysed interval, defaults to the last time point.
+        :param onset_slope: Slope in mV/ms above which the membrane potential is rising
+          into an action potential. The AP amplitude is measured from the last sample
+          before the threshold crossing with a lower slope.
+        :returns: Per trace feature arrays ``spike_count``, ``firing_rate`` (Hz),
+          ``isi_mean``, ``isi_std``, ``isi_cv`` (ms, NaN with less than 2 spikes) and
+          ``ap_amplitude`` (mean over the spikes, NaN without spikes), and the list of
+          ``spike_times`` of each trace.
+        :rtype: dict
+    """
+    t = np.asarray(t, dtype=float)
+    traces = np.atleast_2d(np.asarray(traces, dtype=float))
+    rows, peaks = detect_spikes(t, traces, threshold, start, end)
+    n_traces = traces.shape[0]
+    counts = np.bincount(rows, minlength=n_traces)
+    times = t[peaks]
+    window = (t[-1] if end is None else end) - (t[0] if start is None else start)
+
+    # Intervals between consecutive spikes of the same trace.
+    same = rows[1:] == rows[:-1]
+    isi_rows = rows[1:][same]
+    isis = np.diff(times)[same]
+    isi_counts = np.bincount(isi_rows, minlength=n_traces)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        isi_mean = np.bincount(isi_rows, isis, n_traces) / isi_counts
+        isi_var = np.bincount(isi_rows, isis ** 2, n_traces) / isi_counts - isi_mean ** 2
+        isi_std = np.sqrt(np.maximum(isi_var, 0))
+        amplitudes = traces[rows, peaks] - traces[rows, _onsets(t, traces, rows, peaks, threshold, onset_slope)]
+        ap_amplitude = np.bincount(rows, amplitudes, n_traces) / counts
+    return {
+        "spike_times": np.split(times, np.cumsum(counts)[:-1]),
+        "spike_count": counts,
+        "firing_rate": counts / window * 1000,
+        "isi_mean": isi_mean,
+        "isi_std": isi_std,
+        "isi_cv": isi_std / isi_mean,
+        "ap_amplitude": ap_amplitude,
+    }
+
+def _first_index(t, start):
+    return 0 if start is None else int(np.searchsorted(t, start))
+
+def _window(t, traces, start, end):
+    t = np.asarray(t, dtype=float)
+    traces = np.atleast_2d(np.asarray(traces, dtype=float))
+    first = _first_index(t, start)
+    last = len(t) if end is None else int(np.searchsorted(t, end, side="right"))
+    return t[first:last], traces[:, first:last]
+
+def _onsets(t, traces, rows, peaks, threshold, onset_slope):
+    # Index of the last sample before the threshold crossing of each spike where the
+    # slope is below `onset_slope`, from running maxima of sample indices per trace.
+    index = np.arange(traces.shape[1])
+    last_below = np.maximum.accumulate(np.where(traces < threshold, index, 0), axis=1)
+    slope = np.gradient(traces, t, axis=1)
+    last_slow = np.maximum.accumulate(np.where(slope < onset_slope, index, 0), axis=1)
+    return last_slow[rows, last_below[rows, peaks]]
@@ -0,0 +1,248 @@
+"""
+    Export of the models to Arbor cable cells.
+
+    The NEURON instance of a model is used as the source of truth for the morphology:
+    after arborize has built and labelled it, the 3D points of every section are copied
+    into an Arbor segment tree. Sections that share the same labels and resolve to the
+    same attribute values are grouped under a single segment tag and decorated with the
+    merged ``section_types`` definition of their labels.
+
+    Mechanisms are painted under their Glia mod name, which is also the ``SUFFIX`` of the
+    mod file, so a catalogue compiled from the same mod files can be loaded as is. Arbor's
+    ``modcc`` does not accept all of NEURON's NMODL, such as ``INDEPENDENT`` blocks, unit
+    constants like ``FARADAY`` or ``v`` declared as ``ASSIGNED``, and none of the mod files
+    of the DBBS mod collection currently compile. :func:`build_catalogue` therefore takes
+    the Arbor ports of the mod files from a directory before it falls back to Glia's.
+"""
+
+import os, shutil, subprocess, tempfile
+import arbor
+from arbor import units as U
+from patch import p
+import glia as g
+from .definitions import parse_mechanism, split_attributes, merge_definitions
+from .memory import labelled_sections
+from .coreneuron import mod_files
+
+_default_ions = ("na", "k", "ca")
+_geometry_attributes = ("L", "diam")
+
+def to_arbor(model, v_init=-65, celsius=32, threshold=-20):
+    """
+        Create an Arbor cable cell from a model.
+
+        :param model: A model instance, or a model class that will be instantiated.
+        :type model: :class:`arborize.NeuronModel`
+        :param v_init: Initial membrane potential in mV.
+        :param celsius: Temperature in degrees Celsius.
+        :param threshold: Threshold in mV of the spike detector on the soma.
+        :returns: The cable cell.
+        :rtype: :class:`arbor.cable_cell`
+    """
+    if isinstance(model, type):
+        model = model()
+    tree, groups = _segment_tree(model)
+    labels = arbor.label_dict(_region_labels(groups))
+    labels["soma_center"] = '(on-components 0.5 (region "soma"))'
+    decor = arbor.decor()
+    decor.set_property(Vm=v_init * U.mV, tempK=(celsius + 273.15) * U.Kelvin)
+    with g.context(pkg=getattr(model, "_package", None)):
+        for tag, (section_labels, definition, diam) in enumerate(groups, start=1):
+            _paint_group(decor, "group_{}".format(tag), definition, diam)
+    decor.place('"soma_center"', arbor.threshold_detector(threshold * U.mV), "detector")
+    # Use about as many CVs as arborize's `1 + 2 * int(L / 40)` segments.
+    policy = arbor.cv_policy_max_extent(20 * U.um)
+    return arbor.cable_cell(tree, decor, labels, policy)
+
+def global_properties(model, catalogue=None):
+    """
+        Create the global cable properties for the exported cells of a model. Ions other
+        than Arbor's predefined ``na``, ``k`` and ``ca`` that appear as reversal potential
+        in the ``section_types`` are declared as monovalent ions.
+
+        :param model: Model class or instance.
+        :param catalogue: Path to a compiled catalogue, or a :class:`arbor.catalogue`,
+          that contains the mod names of the model's mechanisms.
+    """
+    properties = arbor.neuron_cable_properties()
+    if catalogue is not None:
+        if isinstance(catalogue, str):
+            catalogue = arbor.load_catalogue(catalogue)
+        properties.catalogue.extend(catalogue, "")
+    for ion in sorted(_model_ions(model) - set(_default_ions)):
+        properties.set_ion(ion, valence=1)
+    return properties
+
+def build_catalogue(model, path, mod_dir=None):
+    """
+        Compile an Arbor catalogue of the mechanisms that :func:`to_arbor` paints on a
+        model with ``arbor-build-catalogue``.
+
+        :param model: Model class or instance.
+        :param path: Path of the compiled catalogue.
+        :param mod_dir: Directory with Arbor ports of mod files, named after their mod
+          name, e.g. ``glia__dbbs_mod_collection__Leak__0.mod``. Mod files that are not
+          found here are taken from the Glia packages.
+        :returns: The path of the compiled catalogue.
+        :raises FileNotFoundError: If there is no mod file for one of the mechanisms.
+        :raises subprocess.CalledProcessError: If the catalogue fails to compile.
+    """
+    sources = mod_files()
+    with tempfile.TemporaryDirectory() as build_dir:
+        mod_path = os.path.join(build_dir, "mod")
+        os.mkdir(mod_path)
+        with g.context(pkg=getattr(model, "_package", None)):
+            for mod_name in _mod_names(model):
+                source = os.path.join(mod_dir, mod_name + ".mod") if mod_dir else None
+                if source is None or not os.path.exists(source):
+                    source = sources.get(mod_name)
+                if source is None or not os.path.exists(source):
+                    raise FileNotFoundError("No mod file for '{}'.".format(mod_name))
+                shutil.copy(source, os.path.join(mod_path, mod_name + ".mod"))
+        subprocess.check_call(["arbor-build-catalogue", "-q", "dbbs", mod_path], cwd=build_dir)
+        shutil.move(os.path.join(build_dir, "dbbs-catalogue.so"), path)
+    return path
+
+class PopulationRecipe(arbor.recipe):
+    """
+        Recipe of unconnected copies of one exported cell, with a soma voltage probe on
+        every cell under the ``"Vm"`` tag.
+    """
+    def __init__(self, cell, properties, n=1):
+        arbor.recipe.__init__(self)
+        self.cell = cell
+        self.properties = properties
+        self.n = n
+
+    def num_cells(self):
+        return self.n
+
+    def cell_kind(self, gid):
+        return arbor.cell_kind.cable
+
+    def cell_description(self, gid):
+        return self.cell
+
+    def probes(self, gid):
+        return [arbor.cable_probe_membrane_voltage('"soma_center"', "Vm")]
+
+    def global_properties(self, kind):
+        return self.properties
+
+def _mod_names(model):
+    mod_names = set()
+    for definition in model.section_types.values():
+        for mechanism in definition["mechanisms"]:
+            name, variant = parse_mechanism(mechanism)
+            mod_names.add(g.resolve(name, variant=variant) if variant else g.resolve(name))
+    return sorted(mod_names)
+
+def _model_ions(model):
+    ions = set()
+    for definition in model.section_types.values():
+        for attribute in definition["attributes"]:
+            if _is_reversal_potential(attribute):
+                ions.add(attribute[1:])
+    return ions
+
+def _is_reversal_potential(attribute):
+    return not isinstance(attribute, tuple) and len(attribute) > 1 and attribute[0] == "e"
+
+def _section_key(model, labels, diam):
+    definition = merge_definitions(model, labels)
+    section_attributes, mechanism_attributes = split_attributes(definition["attributes"], diam)
+    values = tuple(sorted(section_attributes.items())) + tuple(
+        (m, tuple(sorted(a.items()))) for m, a in sorted(mechanism_attributes.items())
+    )
+    return tuple(labels), values
+
+def _segment_tree(model):
+    # Make sure that sections without 3D data get 3D points.
+    p.define_shape()
+    tags = {}
+    groups = []
+    section_labels = {nrn_section: labels for nrn_section, labels, _ in labelled_sections(model)}
+    tree = arbor.segment_tree()
+    # Map of each NEURON section to its parent segment id and its segment ids with the
+    # relative arc length of their distal ends.
+    attachments = {}
+    for section in _tree_order(list(section_labels)):
+        key = _section_key(model, section_labels[section], section.diam)
+        if key not in tags:
+            definition = merge_definitions(model, section_labels[section])
+            groups.append((key[0], definition, section.diam))
+            tags[key] = len(groups)
+        attachment = _parent_segment(section, attachments)
+        parent = attachment
+        points = _points(section)
+        total = sum(_distance(a, b) for a, b in zip(points, points[1:])) or 1.
+        segments = []
+        distance = 0.
+        for proximal, distal in zip(points, points[1:]):
+            parent = tree.append(parent, arbor.mpoint(*proximal), arbor.mpoint(*distal), tags[key])
+            distance += _distance(proximal, distal)
+            segments.append((parent, distance / total))
+        attachments[section] = (attachment, segments)
+    return tree, groups
+
+def _tree_order(sections):
+    members = set(sections)
+    stack = [s for s in sections if s.parentseg() is None or s.parentseg().sec not in members]
+    ordered = []
+    while stack:
+        section = stack.pop(0)
+        ordered.append(section)
+        stack.extend(c for c in section.children() if c in members)
+    return ordered
+
+def _parent_segment(section, attachments):
+    parent_segment = section.parentseg()
+    if parent_segment is None or parent_segment.sec not in attachments:
+        return arbor.mnpos
+    own_parent, segments = attachments[parent_segment.sec]
+    # Attach to the segment end closest to the connection point on the parent.
+    candidates = [(own_parent, 0.)] + segments
+    return min(candidates, key=lambda c: abs(c[1] - parent_segment.x))[0]
+
+def _points(section):
+    points = [
+        (section.x3d(i), section.y3d(i), section.z3d(i), section.diam3d(i) / 2)
+        for i in range(section.n3d())
+    ]
+    # Drop repeated points, but keep at least one segment per section.
+    unique = points[:1] + [b for a, b in zip(points, points[1:]) if a[:3] != b[:3]]
+    return unique if len(unique) > 1 else points[:1] + points[-1:]
+
+def _distance(a, b):
+    return sum((x - y) ** 2 for x, y in zip(a[:3], b[:3])) ** 0.5
+
+def _region_labels(groups):
+    regions = {}
+    label_tags = {}
+    for tag, (section_labels, definition, diam) in enumerate(groups, start=1):
+        regions["group_{}".format(tag)] = "(tag {})".format(tag)
+        for label in section_labels:
+            label_tags.setdefault(label, []).append("(tag {})".format(tag))
+    for label, tags in label_tags.items():
+        regions[label] = tags[0] if len(tags) == 1 else "(join {})".format(" ".join(tags))
+    return regions
+
+def _paint_group(decor, region, definition, diam):
+    # `diam` is the diameter of one of the sections of the group: they all resolve the
+    # diameter dependent attributes to the same values.
+    region_expr = '"{}"'.format(region)
+    section_attributes, mechanism_attributes = split_attributes(definition["attributes"], diam)
+    for attribute, value in section_attributes.items():
+        if attribute == "cm":
+            decor.paint(region_expr, cm=value * U.uF / U.cm2)
+        elif attribute == "Ra":
+            decor.paint(region_expr, rL=value * U.Ohm * U.cm)
+        elif _is_reversal_potential(attribute):
+            decor.paint(region_expr, ion=attribute[1:], rev_pot=value * U.mV)
+        elif attribute not in _geometry_attributes:
+            raise ValueError("Can't export section attribute '{}' to Arbor.".format(attribute))
+    for mechanism in definition["mechanisms"]:
+        name, variant = parse_mechanism(mechanism)
+        mod_name = g.resolve(name, variant=variant) if variant else g.resolve(name)
+        parameters = mechanism_attributes.get(name, {})
+        decor.paint(region_expr, arbor.density(mod_name, parameters))
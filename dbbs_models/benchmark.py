@@ -0,0 +1,78 @@
+"""
+    Performance measurements of the models: build cost, model size and simulation
+    throughput. Every measurement is returned as plain data so that results can be
+    stored and compared between releases.
+
+    Peak memory is that of the whole process; benchmark each model in a fresh process
+    to get meaningful numbers, as the ``benchmarks/suite.py`` script does.
+"""
+
+import time, resource
+from patch import p
+from .memory import labelled_sections
+
+def model_statistics(model):
+    """
+        Count the sections, segments and mechanism instances of a model instance.
+
+        :returns: Dictionary with the ``sections`` and ``segments`` counts, and the
+          number of ``mechanism_instances`` per mod name.
+        :rtype: dict
+    """
+    segments = 0
+    instances = {}
+    for nrn_section, labels, section in labelled_sections(model):
+        segments += nrn_section.nseg
+        for segment in nrn_section:
+            for mechanism in segment:
+                name = mechanism.name()
+                instances[name] = instances.get(name, 0) + 1
+    return {
+        "sections": len(model.sections),
+        "segments": segments,
+        "mechanism_instances": instances,
+    }
+
+def benchmark_model(model_class, duration=100, dt=0.025, celsius=32, v_init=-65):
+    """
+        Measure the construction, initialization and simulation cost of a model class.
+
+        :param model_class: The model class to instantiate.
+        :param duration: Simulated time in ms of the throughput measurements.
+        :param dt: Time step in ms of the fixed step measurement.
+        :returns: Dictionary of measurements. Times are in seconds, memory in kB and
+          throughput in simulated ms per wall second.
+        :rtype: dict
+    """
+    rss_before = _peak_rss()
+    start = time.perf_counter()
+    model = model_class()
+    build_time = time.perf_counter() - start
+    peak_rss = _peak_rss()
+
+    p.celsius = celsius
+    p.dt = dt
+    p.cvode.active(0)
+    start = time.perf_counter()
+    p.finitialize(v_init)
+    init_time = time.perf_counter() - start
+
+    results = {
+        "build_time": build_time,
+        "build_rss": peak_rss - rss_before,
+        "peak_rss": peak_rss,
+        "finitialize_time": init_time,
+    }
+    results.update(model_statistics(model))
+    for key, cvode in (("fixed_step", 0), ("cvode", 1)):
+        p.cvode.active(cvode)
+        p.finitialize(v_init)
+        start = time.perf_counter()
+        p.continuerun(duration)
+        results[key] = duration / (time.perf_counter() - start)
+    p.cvode.active(0)
+    return results
+
+def _peak_rss():
+    # `ru_maxrss` is in kB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -0,0 +1,168 @@
+"""
+    CoreNEURON run mode for the models.
+
+    CoreNEURON needs the Glia library to be compiled with ``nrnivmodl -coreneuron``, see
+    :func:`compile_mechanisms`, and only simulates cells that are registered with a gid on
+    the ParallelContext. Spikes are therefore detected on the soma through
+    ``create_transmitter`` and recorded with ``spike_record``; voltage recordings made
+    with ``record_soma()`` are transferred back by CoreNEURON in memory.
+"""
+
+import os, re, platform, subprocess, weakref
+from patch import p
+import glia as g
+from .definitions import parse_mechanism
+
+# Constructs in mod files that CoreNEURON can't translate or run.
+_blocking_patterns = {
+    "VERBATIM": "VERBATIM blocks are not translated for CoreNEURON.",
+    "POINTER": "POINTER variables require a BBCOREPOINTER for CoreNEURON.",
+    "scop_random|normrand|exprand|unirand": "Uses random functions that are not available in CoreNEURON.",
+}
+
+# The gid under which `run` registered each model.
+_model_gids = weakref.WeakKeyDictionary()
+
+def compatibility_report(model_class):
+    """
+        Check the mod files of all mechanisms and synapses of a model for constructs that
+        CoreNEURON does not support.
+
+        :param model_class: The model class to check.
+        :returns: A dictionary with the list of issues found for each mod name used by the
+          model. The model is compatible if all lists are empty.
+        :rtype: dict
+    """
+    files = mod_files()
+    report = {}
+    with g.context(pkg=getattr(model_class, "glia_package", None)):
+        for mod_name in _model_mod_names(model_class):
+            path = files.get(mod_name)
+            if path is None or not os.path.exists(path):
+                # Builtin mechanisms such as `pas` are part of CoreNEURON.
+                report[mod_name] = []
+                continue
+            with open(path, "r") as f:
+                source = _strip_comments(f.read())
+            report[mod_name] = [
+                issue for pattern, issue in _blocking_patterns.items()
+                if re.search(r"\b(?:{})\b".format(pattern), source)
+                and not (pattern == "POINTER" and "BBCOREPOINTER" in source)
+            ]
+    return report
+
+def is_compatible(model_class):
+    """
+        Check whether all mechanisms of a model can be simulated by CoreNEURON.
+    """
+    return not any(compatibility_report(model_class).values())
+
+def is_available():
+    """
+        Check whether the Glia library was compiled with CoreNEURON support.
+    """
+    return os.path.exists(_corenrn_library())
+
+def compile_mechanisms():
+    """
+        Recompile the Glia library with CoreNEURON support. The library is used by both
+        NEURON and CoreNEURON, and is loaded at the next start of the Python process.
+    """
+    subprocess.check_call(["nrnivmodl", "-coreneuron"], cwd=_library_path())
+
+def run(models, duration, dt=0.025, celsius=32, v_init=-65, coreneuron=True, gpu=False, gid_offset=0):
+    """
+        Simulate models with fixed time steps through ``ParallelContext.psolve``, either on
+        CoreNEURON or on the classic NEURON engine.
+
+        :param models: The model instances to simulate. The soma of the model with index
+          ``i`` is registered as the spike source of gid ``gid_offset + i``.
+        :param duration: Simulated time in ms.
+        :param coreneuron: Run on CoreNEURON instead of NEURON.
+        :param gpu: Run CoreNEURON on the GPU.
+        :param gid_offset: First gid of the models.
+        :returns: The spike times of each gid.
+        :rtype: dict
+        :raises ValueError: If one of the gids already belongs to another cell.
+
+        The gids stay registered, so that a model can be run again under the same gid,
+        and are released by NEURON when their model is garbage collected. Other gids of
+        the process, such as the inputs of :class:`.stimulation.SpikeTrains`, are left
+        untouched.
+    """
+    from neuron import coreneuron as _coreneuron
+
+    pc = p.ParallelContext()
+    gids = range(gid_offset, gid_offset + len(models))
+    for gid, model in zip(gids, models):
+        if _model_gids.get(model) != gid and pc.gid_exists(gid):
+            raise ValueError("gid {} already exists on this process.".format(gid))
+    spike_times = p.Vector()
+    spike_gids = p.Vector()
+    for gid, model in zip(gids, models):
+        _register(model, gid)
+        pc.spike_record(gid, spike_times.__neuron__(), spike_gids.__neuron__())
+
+    p.cvode.active(0)
+    p.cvode.cache_efficient(1)
+    p.dt = dt
+    p.celsius = celsius
+    pc.set_maxstep(10)
+    # CoreNEURON looks for the mechanism library in the working directory otherwise.
+    os.environ.setdefault("CORENEURONLIB", _corenrn_library())
+    _coreneuron.enable = coreneuron
+    _coreneuron.gpu = gpu
+    try:
+        p.finitialize(v_init)
+        pc.psolve(duration)
+    finally:
+        _coreneuron.enable = False
+
+    spikes = {gid: [] for gid in gids}
+    for t, gid in zip(spike_times, spike_gids):
+        spikes[int(gid)].append(t)
+    return spikes
+
+def _register(model, gid):
+    if _model_gids.get(model) == gid:
+        return
+    soma = model.soma[0]
+    # arborize caches the transmitter of a section, so a model that was registered under
+    # another gid needs a new one. Registering it moves the soma's spike source to `gid`.
+    if hasattr(soma, "_transmitter"):
+        del soma._transmitter
+    model.create_transmitter(soma, gid)
+    _model_gids[model] = gid
+
+def _corenrn_library():
+    # nrnivmodl builds the library in a directory named after the machine architecture.
+    directory = os.path.join(_library_path(), platform.machine())
+    for library in ("libcorenrnmech.so", "libcorenrnmech.dylib"):
+        if os.path.exists(os.path.join(directory, library)):
+            return os.path.join(directory, library)
+    return os.path.join(directory, "libcorenrnmech.so")
+
+# Glia has no public API for the location of its library and mod files.
+def _library_path():
+    return g._manager.get_neuron_mod_path()
+
+def mod_files():
+    """
+        The paths of the mod files of all Glia packages, by mod name.
+    """
+    return {mod.mod_name: mod.mod_path for pkg in g._manager.packages for mod in pkg.mods}
+
+def _model_mod_names(model_class):
+    mod_names = []
+    for definition in model_class.section_types.values():
+        for mechanism in definition["mechanisms"]:
+            name, variant = parse_mechanism(mechanism)
+            mod_names.append(g.resolve(name, variant=variant) if variant else g.resolve(name))
+    for definition in getattr(model_class, "synapse_types", {}).values():
+        name, variant = parse_mechanism(definition["point_process"])
+        mod_names.append(g.resolve(name, variant=variant) if variant else g.resolve(name))
+    return sorted(set(mod_names))
+
+def _strip_comments(source):
+    source = re.sub(r"COMMENT.*?ENDCOMMENT", "", source, flags=re.S)
+    return re.sub(r":.*", "", source)
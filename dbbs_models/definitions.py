@@ -0,0 +1,61 @@
+"""
+    Helpers to read the declarative ``section_types`` of a model the same way arborize
+    applies them to the NEURON sections of an instance.
+"""
+
+def parse_mechanism(mechanism):
+    """
+        Split a mechanism entry of a ``section_types`` definition into its name and
+        variant. Mechanisms are given either as ``'name'`` or ``('name', 'variant')``.
+
+        :returns: ``(name, variant)``, variant is ``None`` if none was specified.
+    """
+    if isinstance(mechanism, tuple):
+        return mechanism[0], mechanism[1]
+    return mechanism, None
+
+def split_attributes(attributes, diam=None):
+    """
+        Split the ``attributes`` of a ``section_types`` definition into section
+        attributes and mechanism attributes. Callable values are evaluated with ``diam``,
+        just like arborize does.
+
+        :returns: A dictionary of section attributes and a dictionary of dictionaries with
+          the attributes of each mechanism.
+    """
+    section_attributes = {}
+    mechanism_attributes = {}
+    for attribute, value in attributes.items():
+        if callable(value):
+            value = value(diam)
+        if isinstance(attribute, tuple):
+            mechanism_attributes.setdefault(attribute[1], {})[attribute[0]] = value
+        else:
+            section_attributes[attribute] = value
+    return section_attributes, mechanism_attributes
+
+def merge_definitions(model_class, labels, section_types=None):
+    """
+        Merge the ``section_types`` definitions of a list of labels in the order that
+        arborize applies them: mechanisms accumulate and attributes of later labels
+        override those of earlier labels.
+
+        :param model_class: The model class or instance whose ``section_types`` are used.
+        :param labels: Sequence of section labels.
+        :param section_types: Definitions to use instead of those of ``model_class``.
+        :returns: A definition dictionary with ``mechanisms``, ``attributes`` and
+          ``synapses`` keys.
+    """
+    if section_types is None:
+        section_types = model_class.section_types
+    mechanisms = []
+    attributes = {}
+    synapses = []
+    for label in labels:
+        definition = section_types[label]
+        for mechanism in definition["mechanisms"]:
+            if mechanism not in mechanisms:
+                mechanisms.append(mechanism)
+        attributes.update(definition["attributes"])
+        synapses.extend(s for s in definition.get("synapses", []) if s not in synapses)
+    return {"mechanisms": mechanisms, "attributes": attributes, "synapses": synapses}
@@ -0,0 +1,252 @@
+"""
+    Memory footprint of model instances, and a compact representation of their sections.
+
+    A compact instance keeps no Python wrappers for its sections. The NEURON sections of
+    all compact instances are stored in one shared table together with a code for their
+    labels, and the section lists of an instance (``soma``, ``dendrites``, ``axon``,
+    ``sections``, ``parallel_fiber``, ...) become :class:`CompactSections`: arrays of
+    indices into the shared table. Wrappers are only created when a section is accessed,
+    and are only kept by the instance once they hold state such as synapses. The slots of
+    an instance in the shared table are freed, and reused by later compact instances, when
+    the instance is garbage collected.
+"""
+
+import sys, array, types, weakref
+from collections.abc import Sequence
+from patch import p
+from patch.objects import Section, Segment
+from .definitions import merge_definitions
+
+# Approximate sizes in bytes of NEURON's own data structures.
+_section_bytes = 300
+_node_bytes = 200
+_point3d_bytes = 4 * 8
+_property_bytes = 48
+_variable_bytes = 8
+
+_shared_types = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+# Shared table of the NEURON sections of all compact instances and their label codes.
+_section_table = []
+_label_codes = array.array("H")
+_label_table = []
+_free_slots = []
+
+# Attributes of a section wrapper that can be restored from the shared table.
+_restorable = {"_neuron_ptr", "_references", "_interpreter", "_connections", "labels", "synapses", "cell", "available_synapse_types", "_compact_index"}
+
+class _CompactSection(Section):
+    # Wrapper of a section of a compact instance, that is kept by the instance as soon as
+    # something is attached to it.
+    def __ref__(self, obj):
+        super().__ref__(obj)
+        self._keep()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name not in _restorable:
+            self._keep()
+
+    def _keep(self):
+        self.cell._compact_wrappers[self._compact_index] = self
+
+class CompactSections(Sequence):
+    """
+        Read-only sequence of the sections of a compact instance, stored as indices into
+        the shared section table.
+    """
+    __slots__ = ("_model", "_indices")
+
+    def __init__(self, model, indices):
+        self._model = model
+        self._indices = array.array("l", indices)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [_wrapper(self._model, i) for i in self._indices[key]]
+        return _wrapper(self._model, self._indices[key])
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+def compact(model):
+    """
+        Turn a model instance into a compact instance. The section lists of the instance
+        are replaced by :class:`CompactSections` and the section wrappers are released,
+        except for those that hold state such as synapses or recordings, and those that
+        are stored as a single section attribute of the instance.
+
+        :param model: The model instance.
+        :returns: The model instance.
+    """
+    if is_compact(model):
+        return model
+    indices = {}
+    keep = {}
+    for section in model.sections:
+        nrn_section = section.__neuron__()
+        indices[nrn_section] = _store(nrn_section, _label_code(section.labels))
+        if _has_state(section):
+            keep[indices[nrn_section]] = section
+    for name, value in list(model.__dict__.items()):
+        if isinstance(value, Section) and value.__neuron__() in indices:
+            keep[indices[value.__neuron__()]] = value
+    # The wrappers keep each other alive through the references they hold to their
+    # connected sections. The shared table keeps the NEURON sections alive instead.
+    for section in model.sections:
+        section._references = [r for r in section._references if not isinstance(r, Section)]
+    for name, value in list(model.__dict__.items()):
+        if isinstance(value, list) and value and all(isinstance(s, Section) for s in value):
+            setattr(model, name, CompactSections(model, [indices[s.__neuron__()] for s in value]))
+    model._compact_wrappers = keep
+    model._unused_wrappers = weakref.WeakValueDictionary()
+    weakref.finalize(model, _free, list(indices.values()))
+    return model
+
+def is_compact(model):
+    return "_compact_wrappers" in model.__dict__
+
+def labelled_sections(model):
+    """
+        Iterate over the sections of a model instance without creating wrappers for the
+        sections of a compact instance.
+
+        :returns: For each section the NEURON section, its labels as a tuple and its
+          wrapper, or ``None`` if the section is compact and has no wrapper.
+    """
+    if is_compact(model):
+        for index in model.sections._indices:
+            labels = _label_table[_label_codes[index]]
+            yield _section_table[index], labels, _cached_wrapper(model, index)
+    else:
+        for section in model.sections:
+            yield section.__neuron__(), tuple(section.labels), section
+
+def select_sections(model, label):
+    """
+        The sections of a model instance with a label. Of a compact instance, only the
+        wrappers of these sections are created.
+    """
+    if is_compact(model):
+        codes = set(code for code, labels in enumerate(_label_table) if label in labels)
+        return [_wrapper(model, i) for i in model.sections._indices if _label_codes[i] in codes]
+    return [s for s in model.sections if label in s.labels]
+
+def memory_footprint(model):
+    """
+        Estimate the memory used by a model instance, split into NEURON's data and the
+        Python objects of the instance. NEURON's data is estimated from the number of
+        sections, nodes, 3D points and mechanism variables; the Python objects are
+        measured with ``sys.getsizeof``.
+
+        :returns: Dictionary with the bytes used per category under ``neuron`` and
+          ``python``, and their ``total``.
+        :rtype: dict
+    """
+    neuron = {"sections": 0, "nodes": 0, "mechanisms": 0}
+    for section in _nrn_sections(model):
+        neuron["sections"] += _section_bytes + section.n3d() * _point3d_bytes
+        neuron["nodes"] += (section.nseg + 1) * _node_bytes
+        for segment in section:
+            for mechanism in segment:
+                neuron["mechanisms"] += _property_bytes + len(list(mechanism)) * _variable_bytes
+    seen = set()
+    wrappers = _wrappers(model)
+    python = {
+        "wrappers": sum(_deep_size(w, seen, model) for w in wrappers),
+        "instance": _deep_size(model.__dict__, seen, model),
+    }
+    neuron["total"] = sum(neuron.values())
+    python["total"] = sum(python.values())
+    return {"neuron": neuron, "python": python, "total": neuron["total"] + python["total"]}
+
+def _has_state(section):
+    # Synapses attach themselves to the wrapper of their section with `__ref__`.
+    return (
+        set(section.__dict__) - _restorable
+        or section.synapses
+        or section._connections
+        or any(not isinstance(r, (Section, Segment)) for r in section._references)
+    )
+
+def _store(nrn_section, label_code):
+    if _free_slots:
+        index = _free_slots.pop()
+        _section_table[index] = nrn_section
+        _label_codes[index] = label_code
+    else:
+        index = len(_section_table)
+        _section_table.append(nrn_section)
+        _label_codes.append(label_code)
+    return index
+
+def _free(indices):
+    # Called when a compact instance is collected: drop its NEURON sections.
+    for index in indices:
+        _section_table[index] = None
+    _free_slots.extend(indices)
+
+def _label_code(labels):
+    labels = tuple(labels)
+    try:
+        return _label_table.index(labels)
+    except ValueError:
+        _label_table.append(labels)
+        return len(_label_table) - 1
+
+def _cached_wrapper(model, index):
+    section = model._compact_wrappers.get(index)
+    if section is None:
+        section = model._unused_wrappers.get(index)
+    return section
+
+def _wrapper(model, index):
+    section = _cached_wrapper(model, index)
+    if section is None:
+        # Wrappers without state are only cached as long as they are used elsewhere.
+        section = _CompactSection(p, _section_table[index])
+        section._compact_index = index
+        section.labels = list(_label_table[_label_codes[index]])
+        section.cell = model
+        section.synapses = []
+        synapses = merge_definitions(model, section.labels)["synapses"]
+        if synapses:
+            section.available_synapse_types = synapses
+        model._unused_wrappers[index] = section
+    return section
+
+def _nrn_sections(model):
+    if is_compact(model):
+        return [_section_table[i] for i in model.sections._indices]
+    return [s.__neuron__() for s in model.sections]
+
+def _wrappers(model):
+    if is_compact(model):
+        return list(model._compact_wrappers.values()) + list(model._unused_wrappers.values())
+    return list(model.sections)
+
+def _deep_size(obj, seen, model):
+    # Size of the Python objects reachable from `obj`, without NEURON objects, the
+    # interpreter, the model itself and objects that are shared between instances.
+    if id(obj) in seen or obj is model or obj is p or obj is _section_table:
+        return 0
+    kind = type(obj)
+    if kind.__module__ in ("nrn", "hoc", "neuron.hoc") or isinstance(obj, _shared_types):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen, model) + _deep_size(v, seen, model) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(v, seen, model) for v in obj)
+    elif isinstance(obj, CompactSections):
+        size += _deep_size(obj._indices, seen, model)
+    if hasattr(obj, "__dict__"):
+        size += _deep_size(obj.__dict__, seen, model)
+    return size
@@ -0,0 +1,141 @@
+"""
+    Attribution of the time step cost of a model instance to the (section type,
+    mechanism) pairs of its ``section_types``.
+
+    NEURON does not time mechanisms separately, so the cost of each pair is its number of
+    instances times the cost per instance of the mechanism. The cost per instance is
+    measured on a scratch section with many segments in a separate process, where the
+    timing noise of the model can't hide the cost of cheap mechanisms, or taken as 1 when
+    only an estimate from the instance counts is needed. The cable equation itself is reported
+    as the ``cable`` mechanism of each section type.
+"""
+
+import os, sys, time, subprocess
+from patch import p
+import glia as g
+from .definitions import parse_mechanism
+from .memory import labelled_sections
+
+def profile(model, measure=True, steps=100, probe_segments=500, repeats=5):
+    """
+        Rank the (section type, mechanism) pairs of a model instance by their cost per
+        time step.
+
+        :param model: The model instance to profile.
+        :param measure: Measure the cost per instance of each mechanism. If ``False``
+          every instance, and every segment for the ``cable`` rows, costs 1.
+        :param steps: Number of time steps per measurement.
+        :param probe_segments: Number of segments of the scratch section.
+        :param repeats: Number of times each measurement is repeated; the fastest one is
+          used.
+        :returns: Rows of ``(section_type, mechanism, instances, cost)`` sorted by
+          descending cost. Measured costs are in µs per time step.
+        :rtype: list
+    """
+    counts = _instance_counts(model)
+    mod_names = set(mod_name for (_, _, mod_name) in counts if mod_name is not None)
+    if measure:
+        unit_costs = _measure_unit_costs(mod_names, steps, probe_segments, repeats)
+    else:
+        unit_costs = dict.fromkeys(list(mod_names) + [None], 1.)
+    rows = [
+        (label, mechanism, n, n * unit_costs[mod_name])
+        for (label, mechanism, mod_name), n in counts.items()
+    ]
+    return sorted(rows, key=lambda row: -row[3])
+
+def print_profile(rows, file=None):
+    """
+        Print the ranked rows returned by :func:`profile` as a table.
+    """
+    file = file or sys.stdout
+    total = sum(row[3] for row in rows) or 1.
+    print("{:<24} {:<28} {:>9} {:>12} {:>7}".format("section type", "mechanism", "instances", "cost", "share"), file=file)
+    for label, mechanism, n, cost in rows:
+        print("{:<24} {:<28} {:>9} {:>12.3f} {:>6.1f}%".format(label, mechanism, n, cost, cost / total * 100), file=file)
+
+def _mechanism_name(mechanism):
+    name, variant = parse_mechanism(mechanism)
+    return name if variant is None else "{} ({})".format(name, variant)
+
+def _instance_counts(model):
+    # Count the instances of each mechanism under the section type that inserted it. If
+    # several labels of a section insert the same mechanism, the last one is used, as
+    # its attributes are the ones that are applied.
+    counts = {}
+    definitions = model.section_types
+    with g.context(pkg=getattr(model, "_package", None)):
+        for nrn_section, labels, section in labelled_sections(model):
+            nseg = nrn_section.nseg
+            owners = {}
+            for label in labels:
+                for mechanism in definitions[label]["mechanisms"]:
+                    name, variant = parse_mechanism(mechanism)
+                    mod_name = g.resolve(name, variant=variant) if variant else g.resolve(name)
+                    owners[mod_name] = (label, _mechanism_name(mechanism))
+            cable = (labels[-1], "cable", None)
+            counts[cable] = counts.get(cable, 0) + nseg
+            for mod_name, (label, mechanism) in owners.items():
+                key = (label, mechanism, mod_name)
+                counts[key] = counts.get(key, 0) + nseg
+    return counts
+
+def _step_time(steps):
+    p.finitialize()
+    start = time.perf_counter()
+    for _ in range(steps):
+        p.fadvance()
+    return (time.perf_counter() - start) / steps * 1e6
+
+def _added_time(add, remove, steps, repeats):
+    # Alternate measurements with and without the addition, so that both are taken under
+    # the same conditions, and compare the fastest of each.
+    with_addition, without = [], []
+    for _ in range(repeats):
+        add()
+        with_addition.append(_step_time(steps))
+        remove()
+        without.append(_step_time(steps))
+    return max(min(with_addition) - min(without), 0.)
+
+def _measure_unit_costs(mod_names, steps, probe_segments, repeats):
+    # The scratch section is timed in a new process that contains no other sections.
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    out = subprocess.check_output(
+        [sys.executable, "-m", "dbbs_models.profiling", repr(sorted(mod_names)), str(steps), str(probe_segments), str(repeats)],
+        env=env,
+    ).decode("utf-8")
+    return eval(out.split("\n")[-1])
+
+def _unit_costs(mod_names, steps, probe_segments, repeats):
+    p.cvode.active(0)
+    probes = []
+    unit_costs = {None: _added_time(
+        lambda: probes.append(_probe_section(probe_segments)),
+        lambda: p.delete_section(sec=probes.pop().__neuron__()),
+        steps,
+        repeats,
+    ) / probe_segments}
+    probe = _probe_section(probe_segments)
+    for mod_name in mod_names:
+        # Glia loads the library on the first insert.
+        g.insert(probe, mod_name)
+        unit_costs[mod_name] = _added_time(
+            lambda: probe.__neuron__().insert(mod_name),
+            lambda: probe.__neuron__().uninsert(mod_name),
+            steps,
+            repeats,
+        ) / probe_segments
+    return unit_costs
+
+def _probe_section(segments):
+    probe = p.Section(name="profiling_probe")
+    probe.nseg = segments
+    probe.L = segments
+    probe.diam = 1
+    return probe
+
+if __name__ == "__main__":
+    sys.stdout.write("\n" + repr(_unit_costs(eval(sys.argv[1]), *(int(a) for a in sys.argv[2:]))))
@@ -0,0 +1,148 @@
+"""
+    Declarative protocols and an engine that runs a list of them on one model instance.
+
+    A protocol is a dictionary, just like the ``section_types`` of a model:
+
+    .. code-block:: python
+
+        {
+            "name": "soma_current_injection",
+            "duration": 200,
+            "settings": {"dt": 0.025, "celsius": 32, "v_init": -70, "cvode": False},
+            "stimuli": [
+                {"type": "IClamp", "label": "soma", "delay": 0, "dur": 200, "amp": 0.01},
+            ],
+            "recordings": [{"name": "Vm", "label": "soma"}],
+            "features": ["Spikecount"],
+        }
+
+    Stimuli and recordings select a section by ``label`` and ``index`` (default 0) and a
+    location ``x`` (default 0.5). Supported stimuli are ``IClamp``, ``spike_trains``,
+    which plays ``times`` and ``ids`` into ``n`` new synapses of ``synapse_type`` on the
+    sections with ``label``, and ``poisson``, which plays Poisson trains with a ``rate``
+    into them and requires the model to have a reference id. The spike trains of all
+    stimuli are played by one :class:`.stimulation.SpikeTrains` per run. The eFEL
+    ``features`` are extracted from the first recording, between ``stim_start`` and
+    ``stim_end`` if given, otherwise over the whole run.
+"""
+
+from patch import p
+from .stimulation import SpikeTrains
+from .memory import select_sections
+
+default_settings = {"dt": 0.025, "celsius": 32, "v_init": -70, "cvode": False}
+
+def run_protocols(model, protocols):
+    """
+        Run protocols back to back on a model instance. Before each protocol the
+        simulator settings are applied and the state is reinitialized; after each
+        protocol its stimuli and recordings are released. The inputs of a protocol
+        therefore draw the same random streams as on a newly built instance, whichever
+        protocols ran before it.
+
+        :param model: The model instance.
+        :param protocols: A list of protocol dictionaries.
+        :returns: A result dictionary per protocol with its ``name``, the ``time`` and
+          ``recordings`` traces and the extracted ``features``.
+        :rtype: list
+    """
+    return [run_protocol(model, protocol) for protocol in protocols]
+
+def run_protocol(model, protocol, monitor=None, chunk=25):
+    """
+        Run a single protocol on a model instance, see :func:`run_protocols`.
+
+        :param monitor: Function that is called with the current time after every
+          ``chunk`` ms of simulated time. If it returns ``False`` the run is aborted and
+          the results cover the simulated time only.
+        :param chunk: Simulated time in ms between two calls of ``monitor``.
+    """
+    settings = dict(default_settings, **protocol.get("settings", {}))
+    p.cvode.active(int(settings["cvode"]))
+    p.dt = settings["dt"]
+    p.celsius = settings["celsius"]
+
+    inputs = SpikeTrains()
+    stimuli = [_stimulus(model, stimulus, inputs) for stimulus in protocol.get("stimuli", [])]
+    time = p.Vector()
+    time.record(p._ref_t)
+    recordings = {
+        recording.get("name", recording["label"]): _recording(model, recording)
+        for recording in protocol.get("recordings", [{"name": "Vm", "label": "soma"}])
+    }
+
+    p.finitialize(settings["v_init"])
+    if monitor is None:
+        p.continuerun(protocol["duration"])
+    else:
+        t = 0
+        while t < protocol["duration"]:
+            t = min(t + chunk, protocol["duration"])
+            p.continuerun(t)
+            if monitor(t) is False:
+                break
+
+    result = {
+        "name": protocol.get("name"),
+        "time": list(time),
+        "recordings": {name: list(vector) for name, vector in recordings.items()},
+    }
+    result["features"] = _features(protocol, result)
+    return result
+
+def _section(model, definition):
+    return select_sections(model, definition["label"])[definition.get("index", 0)]
+
+def _stimulus(model, definition, inputs):
+    kind = definition["type"]
+    if kind == "IClamp":
+        section = _section(model, definition)
+        clamp = p.IClamp(definition.get("x", 0.5), sec=section.__neuron__())
+        clamp.delay = definition.get("delay", 0)
+        clamp.dur = definition["dur"]
+        clamp.amp = definition["amp"]
+        return clamp
+    elif kind in ("spike_trains", "poisson"):
+        sections = select_sections(model, definition["label"])
+        targets = [sections[i % len(sections)] for i in range(definition["n"])]
+        if kind == "poisson":
+            return inputs.add_poisson(
+                model,
+                definition["synapse_type"],
+                targets,
+                definition["rate"],
+                definition["duration"],
+                start=definition.get("start", 0),
+                weights=definition.get("weight", 1.),
+            )
+        return inputs.add(
+            model,
+            definition["synapse_type"],
+            targets,
+            definition["times"],
+            definition["ids"],
+            weights=definition.get("weight", 1.),
+        )
+    raise ValueError("Unknown stimulus type '{}'.".format(kind))
+
+def _recording(model, definition):
+    section = _section(model, definition).__neuron__()
+    vector = p.Vector()
+    variable = definition.get("variable", "v")
+    vector.record(getattr(section(definition.get("x", 0.5)), "_ref_" + variable))
+    return vector
+
+def _features(protocol, result):
+    if not protocol.get("features"):
+        return {}
+    import efel
+
+    time = result["time"]
+    trace = {
+        "T": time,
+        "V": next(iter(result["recordings"].values())),
+        "stim_start": [protocol.get("stim_start", time[0])],
+        "stim_end": [protocol.get("stim_end", time[-1])],
+    }
+    values = efel.getFeatureValues([trace], protocol["features"])[0]
+    return {k: (v.tolist() if v is not None else None) for k, v in values.items()}
@@ -0,0 +1,110 @@
+"""
+    Regression testing against stored reference spike times.
+
+    A reference stores the somatic spike times of a model during a declarative protocol,
+    see :mod:`.protocols`. The comparison runs the protocol in chunks and checks the
+    spikes after every chunk, so a diverging model is reported as soon as a spike is
+    missing, added or shifted by more than the tolerance, instead of at the end of the run.
+"""
+
+import os, json
+import numpy as np
+from patch import p
+from .protocols import run_protocol
+
+class ReferenceStore:
+    """
+        Directory of reference spike times, one JSON file per (model, protocol).
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        if not os.path.isdir(self.path):
+            return
+        for file in sorted(os.listdir(self.path)):
+            if file.endswith(".json"):
+                yield tuple(file[:-5].split(".", 1))
+
+    def save(self, model_name, protocol, spike_times):
+        """
+            Store the reference spike times of a model for a protocol. The protocol must
+            have a ``name``.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        reference = {
+            "model": model_name,
+            "protocol": protocol,
+            "spike_times": [round(float(t), 3) for t in spike_times],
+        }
+        with open(self._file(model_name, protocol["name"]), "w") as f:
+            json.dump(reference, f, indent=2)
+
+    def load(self, model_name, protocol_name):
+        """
+            Load a reference as a dictionary with the ``model`` name, the ``protocol`` and
+            its ``spike_times``.
+        """
+        with open(self._file(model_name, protocol_name), "r") as f:
+            return json.load(f)
+
+    def _file(self, model_name, protocol_name):
+        return os.path.join(self.path, "{}.{}.json".format(model_name, protocol_name))
+
+def record_reference(model, protocol, threshold=-20):
+    """
+        Run a protocol and return the somatic spike times of the model.
+    """
+    spikes, recorder = _spike_recorder(model, threshold)
+    run_protocol(model, protocol)
+    return list(spikes)
+
+def compare_reference(model, protocol, spike_times, tolerance=0.1, chunk=25, threshold=-20):
+    """
+        Run a protocol and compare the somatic spike times of the model to reference
+        spike times. The run is aborted as soon as they diverge.
+
+        :param tolerance: Maximum difference in ms between a spike and its reference.
+        :param chunk: Simulated time in ms between two comparisons.
+        :returns: Whether the spikes ``passed``, the ``time`` at which the run ended, a
+          ``message`` describing the divergence and the recorded ``spike_times``.
+        :rtype: dict
+    """
+    reference = np.array(spike_times, dtype=float)
+    spikes, recorder = _spike_recorder(model, threshold)
+    result = {"passed": True, "time": protocol["duration"], "message": None}
+
+    def monitor(t):
+        final = t >= protocol["duration"]
+        message = _divergence(np.array(spikes), reference, t, tolerance, final)
+        if message is not None:
+            result.update(passed=False, time=t, message=message)
+            return False
+
+    run_protocol(model, protocol, monitor=monitor, chunk=chunk)
+    result["spike_times"] = list(spikes)
+    return result
+
+def _spike_recorder(model, threshold):
+    soma = model.soma[0].__neuron__()
+    recorder = p.NetCon(soma(0.5)._ref_v, None, sec=soma)
+    recorder.threshold = threshold
+    spikes = p.Vector()
+    recorder.record(spikes)
+    return spikes, recorder
+
+def _divergence(spikes, reference, t, tolerance, final):
+    # Spikes are only final once the tolerance window after them has been simulated, so
+    # missing spikes are reported `tolerance` ms after their reference time.
+    n = len(spikes)
+    expected = len(reference) if final else np.searchsorted(reference, t - tolerance, side="right")
+    allowed = np.searchsorted(reference, t + tolerance, side="right")
+    if n > allowed:
+        return "Unexpected spike at {:.3f} ms.".format(spikes[allowed])
+    if n < expected:
+        return "Missing spike at {:.3f} ms.".format(reference[n])
+    shifts = np.abs(spikes - reference[:n])
+    if np.any(shifts > tolerance):
+        i = np.argmax(shifts > tolerance)
+        return "Spike at {:.3f} ms instead of {:.3f} ms.".format(spikes[i], reference[i])
+    return None
@@ -0,0 +1,211 @@
+"""
+    Engine that drives the ``synapse_types`` of models with spike trains.
+
+    All spike trains are played by a single ``PatternStim`` from one pair of time and id
+    Vectors. Every input train is a virtual gid that is connected to its own synapse with
+    ``ParallelContext.gid_connect``, so no per input stimulator objects are created. The
+    virtual gids are allocated for the whole process, starting at :data:`first_input_gid`
+    and skipping the gids of cells, so that the inputs of different collections never
+    share a gid.
+
+    Random numbers are drawn from the streams of :mod:`.streams`, keyed by the reference id
+    of the receiving model and the index of the synapse on that model, so that the inputs
+    of a cell do not depend on the rank that simulates it. A collection reserves the
+    indices of its synapses on each model, from the lowest index that no other live
+    collection uses on that model, and releases them when it is garbage collected, so
+    that adding the same inputs again to a model draws the same streams. Models that
+    receive random inputs must be given a reference id with ``set_reference_id``.
+"""
+
+import weakref
+import numpy as np
+from patch import p
+import glia as g
+from arborize.exceptions import SynapseNotPresentError, SynapseNotDefinedError
+from .definitions import parse_mechanism
+from . import streams
+
+# First gid of the input trains, above the gids of the cells.
+first_input_gid = 10 ** 8
+_next_input_gid = first_input_gid
+# Default NetCon delay of the inputs in ms. Once a process has used `psolve`, NEURON
+# requires the delay of every `gid_connect` to be at least one time step.
+default_delay = 0.1
+# Synapse index ranges reserved on each model instance by the live collections.
+_reserved_indices = weakref.WeakKeyDictionary()
+
+class InputGroup:
+    """
+        The synapses and NetCons of one synapse group added to :class:`SpikeTrains`.
+    """
+    def __init__(self, synapse_type, synapses, netcons, gids):
+        self.synapse_type = synapse_type
+        self.synapses = synapses
+        self.netcons = netcons
+        self.gids = gids
+
+    def __len__(self):
+        return len(self.netcons)
+
+    def set_weights(self, weights):
+        """
+            Set the NetCon weight of every input, from a scalar or one value per input.
+        """
+        for netcon, weight in zip(self.netcons, np.broadcast_to(weights, len(self))):
+            netcon.weight[0] = weight
+
+    def set_delays(self, delays):
+        """
+            Set the NetCon delay of every input, from a scalar or one value per input.
+        """
+        for netcon, delay in zip(self.netcons, np.broadcast_to(delays, len(self))):
+            netcon.delay = delay
+
+class SpikeTrains:
+    """
+        Collection of spike train inputs to the synapses of models.
+    """
+    def __init__(self):
+        self.groups = []
+        self._times = []
+        self._ids = []
+        self._pattern = None
+        self._reservations = []
+        weakref.finalize(self, _release_indices, self._reservations)
+
+    def add(self, model, synapse_type, sections, spike_times, input_ids, weights=1., delays=default_delay, x=0.5):
+        """
+            Add a group of inputs that each drive a new synapse of ``synapse_type``. If
+            the synapse type defines ``random_streams``, the name of a function of its
+            point process, that function is called with the Random123 ids of the
+            synapse's stream.
+
+            :param model: The model instance that receives the inputs.
+            :param synapse_type: Name of a synapse type of the model.
+            :param sections: The target section of each input.
+            :param spike_times: Spike times of all inputs of the group.
+            :type spike_times: 1D array
+            :param input_ids: For each spike time, the index of its input in ``sections``.
+            :type input_ids: 1D array
+            :param weights: NetCon weight, a scalar or one value per input.
+            :param delays: NetCon delay, a scalar or one value per input. Must not be
+              smaller than the time step in simulations that use ``psolve``.
+            :param x: Location of the synapses on their sections.
+            :returns: The group of created synapses and NetCons.
+            :rtype: :class:`InputGroup`
+        """
+        mod_name, definition = _synapse_definition(model, synapse_type)
+        attributes = definition.get("attributes", {})
+        _check_sections(model, synapse_type, sections)
+        pc = p.ParallelContext()
+        gids = _allocate_gids(len(sections))
+        first_index = self._reserve_indices(model, len(sections))
+        synapses = []
+        netcons = []
+        for index, (section, gid) in enumerate(zip(sections, gids), start=first_index):
+            synapse = getattr(p, mod_name)(section.__neuron__()(x))
+            for attribute, value in attributes.items():
+                setattr(synapse, attribute, value)
+            if "random_streams" in definition:
+                streams.seed_mechanism(synapse, definition["random_streams"], _gid(model), index)
+            synapses.append(synapse)
+            netcons.append(pc.gid_connect(int(gid), synapse))
+        group = InputGroup(synapse_type, synapses, netcons, gids)
+        group.set_weights(weights)
+        group.set_delays(delays)
+        self.groups.append(group)
+        self._times.append(np.asarray(spike_times, dtype=float))
+        self._ids.append(gids[np.asarray(input_ids, dtype=int)])
+        self._load()
+        return group
+
+    def add_poisson(self, model, synapse_type, sections, rate, duration, start=0, weights=1., delays=default_delay, x=0.5):
+        """
+            Add a group of inputs that each drive a new synapse of ``synapse_type`` with
+            an independent Poisson spike train, drawn from the input stream of the
+            synapse. See :meth:`add` for the other parameters.
+
+            :param rate: Firing rate of each input in Hz.
+            :param duration: Duration of the spike trains in ms.
+            :param start: Start of the spike trains in ms.
+            :rtype: :class:`InputGroup`
+        """
+        first_index = _free_index(model, len(sections))
+        trains = [
+            streams.poisson_train(rate, duration, _gid(model), first_index + i, start=start)
+            for i in range(len(sections))
+        ]
+        ids = np.repeat(np.arange(len(trains)), [len(train) for train in trains])
+        return self.add(model, synapse_type, sections, np.concatenate(trains), ids, weights, delays, x)
+
+    def _reserve_indices(self, model, n):
+        first = _free_index(model, n)
+        reservation = (first, first + n)
+        _reserved_indices.setdefault(model, []).append(reservation)
+        self._reservations.append((weakref.ref(model), reservation))
+        return first
+
+    def _load(self):
+        # PatternStim sends the events in the order of the Vectors.
+        times = np.concatenate(self._times)
+        ids = np.concatenate(self._ids)
+        order = np.argsort(times, kind="stable")
+        self._vectors = (p.Vector(times[order]), p.Vector(ids[order].astype(float)))
+        if self._pattern is None:
+            self._pattern = p.PatternStim()
+            self._pattern.fake_output = 1
+        self._pattern.play(*(v.__neuron__() for v in self._vectors))
+
+def _allocate_gids(n):
+    global _next_input_gid
+    pc = p.ParallelContext()
+    first = _next_input_gid
+    while True:
+        taken = [gid for gid in range(first, first + n) if pc.gid_exists(gid)]
+        if not taken:
+            break
+        first = taken[-1] + 1
+    _next_input_gid = first + n
+    return np.arange(first, first + n)
+
+def _synapse_definition(model, synapse_type):
+    synapse_types = getattr(model.__class__, "synapse_types", {})
+    if synapse_type not in synapse_types:
+        raise SynapseNotDefinedError("The synapse type '{}' is not defined in {}.".format(synapse_type, model.__class__.__name__))
+    definition = synapse_types[synapse_type]
+    name, variant = parse_mechanism(definition["point_process"])
+    with g.context(pkg=getattr(model, "_package", None)):
+        mod_name = g.resolve(name, variant=variant) if variant else g.resolve(name)
+    return mod_name, definition
+
+def _free_index(model, n):
+    # First of the lowest `n` consecutive synapse indices that are free on the model.
+    first = 0
+    for start, stop in sorted(_reserved_indices.get(model, [])):
+        if start - first >= n:
+            break
+        first = max(first, stop)
+    return first
+
+def _release_indices(reservations):
+    for model_ref, reservation in reservations:
+        model = model_ref()
+        if model is not None:
+            _reserved_indices[model].remove(reservation)
+
+def _gid(model):
+    gid = getattr(model, "ref_id", None)
+    if gid is None:
+        raise ValueError(
+            "{} has no reference id to key its random streams, call `set_reference_id` first.".format(
+                model.__class__.__name__
+            )
+        )
+    return gid
+
+def _check_sections(model, synapse_type, sections):
+    for section in set(sections):
+        if synapse_type not in getattr(section, "available_synapse_types", []):
+            raise SynapseNotPresentError("The synapse type '{}' is not present on '{}' labelled section in {}.".format(
+                synapse_type, ",".join(section.labels), model.__class__.__name__
+            ))
@@ -0,0 +1,99 @@
+"""
+    Reproducible random streams for simulations distributed over any number of ranks.
+
+    Every stream is identified by the gid of a cell, the index of a synapse or input on
+    that cell and a stream id, and draws from a counter-based Random123 generator keyed by
+    these ids and the global seed. The numbers of a stream therefore do not depend on the
+    rank that owns the cell, on the order in which cells are created or on other streams.
+    Spike trains are generated in Python with NumPy's Philox generator; mechanisms draw
+    from NEURON's Random123 generator.
+"""
+
+import numpy as np
+from patch import p
+
+# Stream ids of the spike trains played into synapses, and of the synapses themselves.
+input_stream = 0
+synapse_stream = 1
+
+_seed = 0
+
+def set_seed(seed):
+    """
+        Set the global seed of all streams, including NEURON's Random123 global index.
+    """
+    global _seed
+    _seed = _check_id(seed, "seed")
+    p.Random().Random123_globalindex(_seed)
+
+def get_seed():
+    return _seed
+
+def stream_ids(gid, index=0, stream=0):
+    """
+        The Random123 ids of a stream.
+
+        :param gid: Gid of the cell.
+        :param index: Index of the synapse or input on the cell.
+        :param stream: Stream id, to draw several independent streams for the same
+          synapse or input.
+        :returns: The 3 ids, each an unsigned 32 bit integer.
+        :rtype: tuple
+    """
+    return _check_id(gid, "gid"), _check_id(index, "index"), _check_id(stream, "stream")
+
+def generator(gid, index=0, stream=0):
+    """
+        NumPy generator of a stream, see :func:`stream_ids`.
+
+        :rtype: :class:`numpy.random.Generator`
+    """
+    gid, index, stream = stream_ids(gid, index, stream)
+    key = np.array([(_seed << 32) | stream, (gid << 32) | index], dtype=np.uint64)
+    return np.random.Generator(np.random.Philox(key=key))
+
+def neuron_random(gid, index=0, stream=0):
+    """
+        NEURON ``Random`` object of a stream, see :func:`stream_ids`.
+    """
+    random = p.Random()
+    random.Random123(*stream_ids(gid, index, stream))
+    return random
+
+def poisson_train(rate, duration, gid, index=0, stream=input_stream, start=0):
+    """
+        Spike times of a Poisson process drawn from a stream, see :func:`stream_ids`.
+
+        :param rate: Firing rate in Hz.
+        :param duration: Duration of the train in ms.
+        :param start: Time of the start of the train in ms.
+        :returns: The sorted spike times in ms.
+        :rtype: 1D array
+    """
+    end = start + duration
+    if rate <= 0 or duration <= 0:
+        return np.empty(0)
+    rng = generator(gid, index, stream)
+    expected = rate * duration / 1000
+    # Draw the intervals in blocks that usually cover the whole train at once.
+    block = int(expected + 4 * np.sqrt(expected)) + 10
+    trains = []
+    t = start
+    while t < end:
+        times = t + np.cumsum(rng.exponential(1000 / rate, block))
+        trains.append(times[times < end])
+        t = times[-1]
+    return np.concatenate(trains)
+
+def seed_mechanism(point_process, method, gid, index=0, stream=synapse_stream):
+    """
+        Pass the Random123 ids of a stream to a mechanism, by calling its ``method``
+        with the 3 ids of :func:`stream_ids`.
+    """
+    getattr(point_process, method)(*stream_ids(gid, index, stream))
+
+def _check_id(value, name):
+    value = int(value)
+    if not 0 <= value < 2 ** 32:
+        raise ValueError("Random123 {} must be an unsigned 32 bit integer, got {}.".format(name, value))
+    return value
@@ -1,14 +1,67 @@
+import numpy as np
 from .validation_models import *
 
-def quick_test(model, duration=300, temperature=32, v_init=-65):
+def quick_test(model, duration=300, temperature=32, v_init=-65, points=2000, file=None, chunk=100):
+    """
+        Simulate one or more model instances together and plot their somatic membrane
+        potential.
+
+        The traces are downsampled while the simulation runs: after every ``chunk`` ms the
+        recorded samples are reduced to the minimum and maximum of each time bucket and the
+        recording vectors are cleared, so that the raw traces are never held in full.
+
+        :param model: A model instance, or a list of model instances to overlay.
+        :param points: Approximate number of points per plotted trace.
+        :param file: Write the figure to this file instead of showing it. ``.html`` files
+          are written by plotly, other formats require ``kaleido``.
+        :param chunk: Simulated time in ms between two reductions of the recordings.
+    """
     from patch import p
+    from plotly import graph_objs as go
 
-    p.time
+    models = model if isinstance(model, (list, tuple)) else [model]
     p.celsius = temperature
     p.v_init = v_init
-    model.record_soma()
+    recordings = [m.record_soma() for m in models]
+    time = p.Vector()
+    time.record(p._ref_t)
+    bucket = duration / max(points // 2, 1)
+    chunk = max(round(chunk / bucket), 1) * bucket
+    traces = [([], []) for _ in models]
     p.finitialize(v_init)
-    p.continuerun(duration)
-    from plotly import graph_objs as go
+    t = 0
+    while t < duration:
+        t = min(t + chunk, duration)
+        p.continuerun(t)
+        t_chunk = np.array(time)
+        for recording, (x, y) in zip(recordings, traces):
+            v_chunk = np.array(recording)
+            keep = _minmax_buckets(t_chunk, v_chunk, bucket)
+            x.extend(t_chunk[keep])
+            y.extend(v_chunk[keep])
+            recording.resize(0)
+        time.resize(0)
+
+    figure = go.Figure([
+        go.Scatter(x=x, y=y, name=m.__class__.__name__)
+        for m, (x, y) in zip(models, traces)
+    ])
+    if file is None:
+        figure.show()
+    elif str(file).endswith(".html"):
+        figure.write_html(file)
+    else:
+        figure.write_image(file)
+    return figure
 
-    go.Figure(go.Scatter(x=list(p.time), y=list(model.Vm), name=model.__class__.__name__)).show()
+def _minmax_buckets(t, v, width):
+    # Indices of the minimum and maximum sample of each time bucket, in time order.
+    buckets = np.floor(t / width)
+    starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+    ends = np.append(starts[1:], len(t))
+    keep = []
+    for start, end in zip(starts, ends):
+        lo = start + np.argmin(v[start:end])
+        hi = start + np.argmax(v[start:end])
+        keep.extend((lo, hi) if lo < hi else (hi, lo) if hi < lo else (lo,))
+    return np.array(keep, dtype=int)
@@ -0,0 +1,85 @@
+"""
+    Incremental updates of the ``section_types`` of live model instances.
+
+    Only the sections with a label whose definition changed are touched. For each
+    combination of labels the old and new definitions are resolved once and compared:
+    removed mechanisms are uninserted, added mechanisms are inserted and only the
+    attributes that changed are set. The new definitions are stored on the instance, so
+    they do not affect other instances of the model.
+"""
+
+import glia as g
+from .variants import resolve_definition
+from .memory import labelled_sections
+
+def update_section_types(model, section_types):
+    """
+        Apply new definitions of section types to a model instance.
+
+        Mechanisms that are still present keep their state and the values of
+        attributes that did not change. A mechanism whose attribute was removed from the
+        definition is reinserted, so that the attribute returns to its default value.
+        Removed section attributes, such as ``Ra``, keep their current value.
+
+        :param model: The model instance.
+        :param section_types: New definitions per label. Labels that are not given keep
+          their current definition.
+        :returns: The number of updated sections.
+        :rtype: int
+    """
+    old = model.section_types
+    new = dict(old)
+    new.update(section_types)
+    changed = set(label for label, definition in section_types.items() if old.get(label) != definition)
+    if not changed:
+        return 0
+    diffs = {}
+    updated = 0
+    for nrn_section, labels, section in labelled_sections(model):
+        if changed.isdisjoint(labels):
+            continue
+        if labels not in diffs:
+            diffs[labels] = _diff(
+                resolve_definition(model, labels, old),
+                resolve_definition(model, labels, new),
+            )
+        removed, added, attributes, synapses = diffs[labels]
+        for mod_name in removed:
+            nrn_section.uninsert(mod_name)
+        for mod_name in added:
+            g.insert(nrn_section, mod_name)
+        for attribute, value in attributes:
+            if callable(value):
+                value = value(nrn_section.diam)
+            setattr(nrn_section, attribute, value)
+        if section is not None:
+            section.available_synapse_types = list(synapses)
+        updated += 1
+    model.section_types = new
+    return updated
+
+def _diff(old, new):
+    old_attributes = dict(old.attributes)
+    new_attributes = dict(new.attributes)
+    # Mechanisms that lose an attribute are reinserted to restore its default value.
+    reset = set(
+        mod_name for mod_name in old.mechanisms if mod_name in new.mechanisms
+        and any(_owner(a, mod_name) and a not in new_attributes for a in old_attributes)
+    )
+    removed = [m for m in old.mechanisms if m not in new.mechanisms or m in reset]
+    added = [m for m in new.mechanisms if m not in old.mechanisms or m in reset]
+    if added:
+        # New mechanisms can add ions, whose section attributes must be set again.
+        attributes = [
+            (a, v) for a, v in new.attributes
+            if not any(_owner(a, m) for m in new.mechanisms) or any(_owner(a, m) for m in added)
+            or old_attributes.get(a, _missing) != v
+        ]
+    else:
+        attributes = [(a, v) for a, v in new.attributes if old_attributes.get(a, _missing) != v]
+    return removed, added, attributes, new.synapses
+
+_missing = object()
+
+def _owner(attribute, mod_name):
+    return attribute.endswith("_" + mod_name)
@@ -0,0 +1,214 @@
+"""
+    Registry of model variants that are derived from a base model by overriding parts of
+    its ``section_types`` and ``synapse_types``, and a cache of compiled definitions.
+
+    A compiled definition is the merged definition of a combination of labels with its
+    mechanisms resolved to mod names and its attributes resolved to NEURON attribute
+    names. Variants build their sections from compiled definitions, so the nested
+    definitions are resolved once per label combination instead of once per section. The
+    compiled definitions are shared by all models whose merged definitions are equal, so
+    the variants of a heterogeneous population only compile the labels they override.
+"""
+
+import sys, copy
+import glia as g
+from arborize import NeuronModel
+from arborize.exceptions import MechanismNotPresentError, SectionAttributeError
+from .definitions import parse_mechanism, merge_definitions
+
+variants = {}
+
+# Compiled definitions by model class and labels, and by their content.
+_class_cache = {}
+_content_cache = {}
+
+class CompiledDefinition:
+    """
+        The resolved definition of a combination of labels.
+
+        :ivar labels: The labels, in the order they are applied.
+        :ivar mechanisms: The mod names of the mechanisms to insert.
+        :ivar attributes: Pairs of NEURON attribute names and values. Callable values
+          still have to be evaluated with the diameter of the section.
+        :ivar synapses: The available synapse types.
+    """
+    __slots__ = ("labels", "mechanisms", "attributes", "synapses")
+
+    def __init__(self, labels, mechanisms, attributes, synapses):
+        self.labels = labels
+        self.mechanisms = mechanisms
+        self.attributes = attributes
+        self.synapses = synapses
+
+class CompiledModel(NeuronModel):
+    """
+        Mixin for models that build their sections from compiled definitions.
+    """
+    def __init__(self, *args, **kwargs):
+        # Variants with their own morphologies must not reuse the morphologies that the
+        # base class imported.
+        cls = self.__class__
+        if "morphologies" in cls.__dict__ and "imported_morphologies" not in cls.__dict__:
+            cls._import_morphologies()
+        super().__init__(*args, **kwargs)
+
+    def _init_section(self, section):
+        section.cell = self
+        section.nseg = 1 + (2 * int(section.L / 40))
+        definition = compile_definition(self.__class__, section.labels)
+        for mod_name in definition.mechanisms:
+            g.insert(section, mod_name)
+        nrn_section = section.__neuron__()
+        for attribute, value in definition.attributes:
+            if callable(value):
+                value = value(section.diam)
+            try:
+                setattr(nrn_section, attribute, value)
+            except AttributeError:
+                raise SectionAttributeError("The attribute '{}' is not found on a section labelled '{}' in the {}.".format(
+                    attribute, ",".join(section.labels), self.__class__.__name__
+                )) from None
+        if definition.synapses:
+            if not hasattr(section, "available_synapse_types"):
+                section.available_synapse_types = []
+            section.available_synapse_types.extend(definition.synapses)
+
+def derive(base, name, section_types=None, synapse_types=None, register=True, keep_labels=None, module=None, **attributes):
+    """
+        Derive a variant from a base model.
+
+        The overrides are given per label or synapse type. Their ``attributes`` are merged
+        into those of the base, other keys such as ``mechanisms`` replace those of the
+        base, and labels or synapse types that the base does not define are added.
+
+        The variant is a subclass of the base, so its instances are also instances of
+        the base and inherit anything that is not overridden, such as its morphologies.
+
+        :param base: The model class to derive from.
+        :param name: Name of the variant class, and of the variant in the registry.
+        :param section_types: Overrides of the ``section_types`` of the base.
+        :param synapse_types: Overrides of the ``synapse_types`` of the base.
+        :param register: Add the variant to :data:`variants`.
+        :param keep_labels: Only keep these ``section_types`` of the base, e.g. for
+          variants with a reduced morphology.
+        :param module: The ``__module__`` of the variant class, by default the module
+          that calls ``derive``. The variant can only be pickled if it is stored under
+          its name in this module.
+        :param attributes: Other class attributes of the variant, e.g. ``morphologies``.
+        :returns: The variant class.
+    """
+    namespace = dict(attributes)
+    namespace["__module__"] = module or sys._getframe(1).f_globals.get("__name__", __name__)
+    base_types = base.section_types
+    if keep_labels is not None:
+        base_types = {label: base_types[label] for label in keep_labels}
+    namespace["section_types"] = _override(base_types, section_types)
+    namespace["synapse_types"] = _override(getattr(base, "synapse_types", {}), synapse_types)
+    bases = (base,) if issubclass(base, CompiledModel) else (CompiledModel, base)
+    variant = type(name, bases, namespace)
+    if register:
+        register_variant(variant)
+    return variant
+
+def register_variant(model_class, name=None):
+    """
+        Add a model class to the registry of variants.
+    """
+    name = name or model_class.__name__
+    if variants.get(name, model_class) is not model_class:
+        raise ValueError("A different variant named '{}' is already registered.".format(name))
+    variants[name] = model_class
+
+def get_variant(name):
+    """
+        Get a registered variant by name.
+    """
+    try:
+        return variants[name]
+    except KeyError:
+        raise KeyError("Unknown variant '{}'.".format(name)) from None
+
+def compile_definition(model_class, labels):
+    """
+        Get the compiled definition of a combination of labels of a model.
+
+        :param model_class: The model class.
+        :param labels: Sequence of section labels.
+        :rtype: :class:`CompiledDefinition`
+    """
+    labels = tuple(labels)
+    try:
+        return _class_cache[(model_class, labels)]
+    except KeyError:
+        pass
+    package = getattr(model_class, "glia_package", None)
+    merged = merge_definitions(model_class, labels)
+    key = (package, labels, _freeze(merged))
+    if key not in _content_cache:
+        _content_cache[key] = _compile(model_class.__name__, package, labels, merged)
+    _class_cache[(model_class, labels)] = _content_cache[key]
+    return _content_cache[key]
+
+def resolve_definition(model, labels, section_types=None):
+    """
+        Compile the definition of a combination of labels without using the cache.
+
+        :param model: The model class or instance whose ``section_types`` are used.
+        :param labels: Sequence of section labels.
+        :param section_types: Definitions to use instead of those of ``model``.
+        :rtype: :class:`CompiledDefinition`
+    """
+    labels = tuple(labels)
+    name = model.__name__ if isinstance(model, type) else model.__class__.__name__
+    package = getattr(model, "glia_package", None)
+    merged = merge_definitions(model, labels, section_types)
+    return _compile(name, package, labels, merged)
+
+def clear_cache(model_class=None):
+    """
+        Forget the compiled definitions of a model class, or of all models. Required
+        after changing the definitions of a model class.
+    """
+    for key in list(_class_cache):
+        if model_class is None or key[0] is model_class:
+            del _class_cache[key]
+    if model_class is None:
+        _content_cache.clear()
+
+def _compile(model_name, package, labels, merged):
+    mod_names = {}
+    with g.context(pkg=package):
+        for mechanism in merged["mechanisms"]:
+            name, variant = parse_mechanism(mechanism)
+            mod_names[name] = g.resolve(name, variant=variant) if variant else g.resolve(name)
+    attributes = []
+    for attribute, value in merged["attributes"].items():
+        if isinstance(attribute, tuple):
+            if attribute[1] not in mod_names:
+                raise MechanismNotPresentError("The attribute {} of {} specifies a mechanism '{}' that is not inserted on '{}' labelled sections.".format(
+                    repr(attribute), model_name, attribute[1], ",".join(labels)
+                ))
+            attributes.append((attribute[0] + "_" + mod_names[attribute[1]], value))
+        else:
+            attributes.append((attribute, value))
+    return CompiledDefinition(labels, tuple(mod_names.values()), tuple(attributes), tuple(merged["synapses"]))
+
+def _override(definitions, overrides):
+    definitions = copy.deepcopy(definitions)
+    for key, override in (overrides or {}).items():
+        if key not in definitions:
+            definitions[key] = copy.deepcopy(override)
+            continue
+        for part, value in override.items():
+            if part == "attributes":
+                definitions[key].setdefault("attributes", {}).update(value)
+            else:
+                definitions[key][part] = copy.deepcopy(value)
+    return definitions
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return tuple((_freeze(k), _freeze(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
@@ -37,6 +37,7 @@ setuptools.setup(
         "nrn-patch>=2.1.1",
      ],
      extras_require={
-        'dev': ['efel']
+        'dev': ['efel'],
+        'arbor': ['arbor>=0.10']
      }
  )
@@ -0,0 +1,22 @@
+: Arbor port of the Leak mechanism of the DBBS mod collection.
+
+NEURON {
+    SUFFIX glia__dbbs_mod_collection__Leak__0
+    NONSPECIFIC_CURRENT il
+    RANGE gmax, e
+}
+
+UNITS {
+    (mA) = (milliamp)
+    (mV) = (millivolt)
+    (S) = (siemens)
+}
+
+PARAMETER {
+    gmax = 0.0003 (S/cm2)
+    e = -80 (mV)
+}
+
+BREAKPOINT {
+    il = gmax*(v - e)
+}
@@ -0,0 +1,18 @@
+from ._helpers import *
+from dbbs_models.arbor_export import to_arbor, global_properties, PopulationRecipe
+import arbor
+from arbor import units as U
+
+def run_protocol(cell, duration=100, catalogue=None):
+    # Same conditions as `init_simulator` sets up for the NEURON protocols.
+    arbor_cell = to_arbor(cell, v_init=-70, celsius=32)
+    recipe = PopulationRecipe(arbor_cell, global_properties(cell, catalogue))
+    sim = arbor.simulation(recipe)
+    handle = sim.sample((0, "Vm"), arbor.regular_schedule(0.025 * U.ms))
+    sim.run(duration * U.ms, 0.025 * U.ms)
+    data, _ = sim.samples(handle)[0]
+
+    return ezfel(
+        T=list(data[:, 0]),
+        V=list(data[:, 1])
+    )
@@ -0,0 +1,14 @@
+from ._helpers import *
+from dbbs_models.coreneuron import run
+from patch import p
+
+def run_protocol(cell, duration=100, coreneuron=True):
+    _vm = cell.record_soma()
+    _time = p.time
+
+    run([cell], duration, dt=0.025, celsius=32, v_init=-70, coreneuron=coreneuron)
+
+    return ezfel(
+        T=list(_time),
+        V=list(_vm)
+    )
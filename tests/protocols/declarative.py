@@ -0,0 +1,4 @@
+from dbbs_models.protocols import run_protocols
+
+def run_protocol(cell, protocols):
+    return {r["name"]: r["features"] for r in run_protocols(cell, protocols)}
@@ -0,0 +1,6 @@
+from dbbs_models.regression import record_reference, compare_reference
+
+def run_protocol(cell, protocol, reference=None, tolerance=0.1):
+    if reference is None:
+        return {"spike_times": record_reference(cell, protocol)}
+    return compare_reference(cell, protocol, reference, tolerance=tolerance)
@@ -0,0 +1,31 @@
+from ._helpers import *
+from dbbs_models.stimulation import SpikeTrains
+from dbbs_models.streams import set_seed
+from patch import p
+
+def run_protocol(cell, synapse_type, label, n=100, rate=50, duration=300, seed=0, gid=0):
+    disable_cvode()
+    init_simulator(tstop=duration)
+
+    set_seed(seed)
+    cell.set_reference_id(gid)
+    sections = [s for s in cell.sections if label in s.labels]
+    inputs = SpikeTrains()
+    inputs.add_poisson(
+        cell,
+        synapse_type,
+        [sections[i % len(sections)] for i in range(n)],
+        rate,
+        duration,
+    )
+
+    _vm = cell.record_soma()
+    _time = p.time
+
+    p.finitialize()
+    p.run()
+
+    return ezfel(
+        T=list(_time),
+        V=list(_vm)
+    )
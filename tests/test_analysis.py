@@ -0,0 +1,23 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy as np
+from runner import run_protocol
+from dbbs_models.analysis import spike_features
+
+class TestSpikeFeatures(unittest.TestCase):
+    def test_efel_consistency(self):
+        results = [
+            run_protocol("GranuleCell", "soma_current_injection", amplitude=amplitude)
+            for amplitude in (0.0, 0.01, 0.016, 0.022)
+        ]
+        t = np.array(results[0]["T"])
+        traces = np.array([r["V"] for r in results])
+        features = spike_features(t, traces, start=results[0]["stim_start"][0], end=results[0]["stim_end"][0])
+        for r, count, times in zip(results, features["spike_count"], features["spike_times"]):
+            self.assertEqual(count, r.Spikecount[0], "Spike count differs from eFEL.")
+            # eFEL interpolates the traces to a 0.1 ms time step.
+            self.assertTrue(np.allclose(times, r.peak_time, atol=0.1), "Spike times differ from eFEL.")
+        self.assertTrue(np.all(np.diff(features["firing_rate"]) >= 0), "Rate does not increase with current.")
+        self.assertTrue(np.isnan(features["isi_mean"][0]), "ISI of a silent trace should be NaN.")
+        efel_amplitudes = [np.mean(r.AP_amplitude) for r in results[1:]]
+        self.assertTrue(np.allclose(features["ap_amplitude"][1:], efel_amplitudes, rtol=0.05), "AP amplitude differs from eFEL.")
@@ -0,0 +1,94 @@
+import os, sys, math, tempfile, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from runner import run_protocol
+
+try:
+    import arbor
+except ImportError:
+    arbor = None
+
+catalogue = os.getenv("DBBS_ARBOR_CATALOGUE")
+# Arbor ports of the mod files used by the simulation tests.
+arbor_mod = os.path.join(os.path.dirname(__file__), "arbor_mod")
+
+@unittest.skipIf(arbor is None, "Arbor is not installed.")
+class TestArborExport(unittest.TestCase):
+
+    def test_golgi_regions(self):
+        import dbbs_models
+        from dbbs_models.arbor_export import to_arbor
+
+        cell = to_arbor(dbbs_models.GolgiCell)
+        for label in dbbs_models.GolgiCell.section_types:
+            self.assertTrue(cell.cables('"{}"'.format(label)), "Missing region '{}'.".format(label))
+        self.assertEqual(len(cell.locations('"soma_center"')), 1, "Soma probe location missing.")
+
+    def test_updated_instance(self):
+        import copy, dbbs_models
+        from dbbs_models.arbor_export import _section_key
+        from dbbs_models.updates import update_section_types
+
+        definition = copy.deepcopy(dbbs_models.GolgiCell.section_types["axon_initial_segment"])
+        definition["attributes"]["Ra"] = 150
+        cell = dbbs_models.GolgiCell()
+        update_section_types(cell, {"axon_initial_segment": definition})
+        section = next(s for s in cell.sections if "axon_initial_segment" in s.labels)
+        labels, values = _section_key(cell, section.labels, section.diam)
+        self.assertIn(("Ra", 150), values, "Export uses the class definitions instead of the instance.")
+
+@unittest.skipIf(arbor is None, "Arbor is not installed.")
+class TestArborSimulation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from dbbs_models.test import SimpleCell
+        from dbbs_models.variants import derive
+        from dbbs_models.arbor_export import build_catalogue
+
+        # A soma with only the mechanisms that have an Arbor port.
+        cls.model = derive(
+            SimpleCell,
+            "LeakCell",
+            keep_labels=[],
+            section_types={"soma": {
+                "mechanisms": ["Leak"],
+                "attributes": {"Ra": 100, "cm": 2, ("e", "Leak"): -60, ("gmax", "Leak"): 0.0003},
+            }},
+            register=False,
+        )
+        cls.build_dir = tempfile.TemporaryDirectory()
+        cls.catalogue = build_catalogue(cls.model, os.path.join(cls.build_dir.name, "leak-catalogue.so"), arbor_mod)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.build_dir.cleanup()
+
+    def test_leak_relaxation(self):
+        from arbor import units as U
+        from dbbs_models.arbor_export import to_arbor, global_properties, PopulationRecipe
+
+        recipe = PopulationRecipe(to_arbor(self.model, v_init=-70), global_properties(self.model, self.catalogue))
+        sim = arbor.simulation(recipe)
+        handle = sim.sample((0, "Vm"), arbor.regular_schedule(1 * U.ms))
+        sim.run(100 * U.ms, 0.025 * U.ms)
+        data, _ = sim.samples(handle)[0]
+        # The membrane relaxes to the reversal potential of the leak, with a time
+        # constant of cm / gmax.
+        tau = 2 / 0.3
+        for t in (0, 5, 20, 99):
+            expected = -60 - 10 * math.exp(-data[t, 0] / tau)
+            self.assertAlmostEqual(data[t, 1], expected, delta=0.05, msg="Painted cell differs from a leaky membrane.")
+
+@unittest.skipIf(arbor is None, "Arbor is not installed.")
+@unittest.skipIf(catalogue is None, "Set DBBS_ARBOR_CATALOGUE to an Arbor catalogue of the DBBS mechanisms, see `build_catalogue`.")
+class TestArborParity(unittest.TestCase):
+
+    def test_golgi_autorhythm(self):
+        neuron = run_protocol("GolgiCell", "autorhythm", duration=300)
+        arbor = run_protocol("GolgiCell", "arbor_autorhythm", duration=300, catalogue=catalogue)
+        self.assertAlmostEqual(arbor.Spikecount[0], neuron.Spikecount[0], delta=1, msg="Spike count differs from NEURON.")
+
+    def test_basket_autorhythm(self):
+        neuron = run_protocol("BasketCell", "autorhythm", duration=300)
+        arbor = run_protocol("BasketCell", "arbor_autorhythm", duration=300, catalogue=catalogue)
+        self.assertAlmostEqual(arbor.Spikecount[0], neuron.Spikecount[0], delta=1, msg="Spike count differs from NEURON.")
@@ -0,0 +1,51 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from runner import run_protocol
+from patch import p
+import dbbs_models
+from dbbs_models import coreneuron
+
+class TestCompatibility(unittest.TestCase):
+
+    def test_granule(self):
+        report = coreneuron.compatibility_report(dbbs_models.GranuleCell)
+        self.assertIn("glia__dbbs_mod_collection__Na__granule_cell_FHF", report, "Mechanism missing from report.")
+        self.assertTrue(coreneuron.is_compatible(dbbs_models.GranuleCell), "Incompatible: {}".format(report))
+
+@unittest.skipUnless(coreneuron.is_available(), "Mechanisms not compiled for CoreNEURON, see `compile_mechanisms`.")
+class TestCoreNeuron(unittest.TestCase):
+
+    def test_golgi_autorhythm(self):
+        results = run_protocol("GolgiCell", "coreneuron_autorhythm", duration=300)
+        self.assertEqual(results.Spikecount[0], 6, "Incorrect spike count.")
+
+class TestRun(unittest.TestCase):
+
+    def test_repeated_runs(self):
+        # A model keeps its gid, so that it can be run again.
+        cell = dbbs_models.GolgiCell()
+        first = coreneuron.run([cell], 100, coreneuron=False, gid_offset=10)
+        second = coreneuron.run([cell], 100, coreneuron=False, gid_offset=10)
+        self.assertGreater(len(first[10]), 0, "Cell did not fire.")
+        self.assertEqual(first, second, "Second run differs.")
+        with self.assertRaises(ValueError):
+            coreneuron.run([dbbs_models.GranuleCell()], 10, coreneuron=False, gid_offset=10)
+        moved = coreneuron.run([cell], 100, coreneuron=False, gid_offset=11)
+        self.assertEqual(moved, {11: first[10]}, "Cell not registered under its new gid.")
+
+    def test_spike_train_inputs(self):
+        # Running other cells must not disconnect the inputs of a cell.
+        from neuron import h
+        from dbbs_models.stimulation import SpikeTrains
+
+        cell = dbbs_models.GranuleCell()
+        cell.set_reference_id(0)
+        inputs = SpikeTrains()
+        group = inputs.add(cell, "AMPA", [cell.dendrites[0]], [5., 10.], [0, 0])
+        coreneuron.run([dbbs_models.GranuleCell()], 10, coreneuron=False, gid_offset=20)
+        events = h.Vector()
+        group.netcons[0].record(events)
+        p.cvode.active(0)
+        p.finitialize(-70)
+        p.continuerun(20)
+        self.assertEqual(list(events), [5., 10.], "Inputs were disconnected.")
@@ -0,0 +1,53 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import dbbs_models
+from dbbs_models.memory import memory_footprint, compact
+
+class TestCompact(unittest.TestCase):
+
+    def test_granule(self):
+        cell = dbbs_models.GranuleCell()
+        synapse = cell.create_synapse(cell.dendrites[1], "AMPA")
+        before = memory_footprint(cell)
+        compact(cell)
+        after = memory_footprint(cell)
+        self.assertEqual(before["neuron"], after["neuron"], "NEURON data changed.")
+        self.assertLess(after["python"]["total"], before["python"]["total"] / 4, "Python overhead not reduced.")
+        self.assertEqual(len(cell.sections), 108, "Sections lost.")
+        self.assertIs(cell.axon[1], cell.axon_initial_segment, "Section identity lost.")
+        self.assertEqual(cell.dendrites[0].labels, ["dendrites"], "Labels lost.")
+        self.assertIn(synapse, cell.dendrites[1]._references, "Synapse released.")
+
+    def test_release(self):
+        from dbbs_models.memory import _section_table
+        import gc
+
+        cell = compact(dbbs_models.GranuleCell())
+        indices = list(cell.sections._indices)
+        del cell
+        gc.collect()
+        self.assertTrue(all(_section_table[i] is None for i in indices), "Sections of a collected instance kept alive.")
+        size = len(_section_table)
+        cell = compact(dbbs_models.GranuleCell())
+        self.assertEqual(len(_section_table), size, "Free slots not reused.")
+        self.assertEqual(cell.dendrites[0].labels, ["dendrites"], "Labels lost.")
+
+    def test_full_pass(self):
+        # Iterating over all sections must not undo the compaction.
+        import gc
+        from dbbs_models.benchmark import model_statistics
+
+        cell = compact(dbbs_models.GranuleCell())
+        wrappers = len(cell._compact_wrappers)
+        size = memory_footprint(cell)["python"]["total"]
+        self.assertEqual(model_statistics(cell), model_statistics(dbbs_models.GranuleCell()))
+        for section in cell.sections:
+            section.labels
+        gc.collect()
+        self.assertEqual(len(cell._compact_wrappers), wrappers, "Wrappers without state kept.")
+        self.assertLess(memory_footprint(cell)["python"]["total"], size * 2, "Python overhead grew.")
+        synapse = cell.create_synapse(cell.dendrites[2], "AMPA")
+        del synapse
+        gc.collect()
+        self.assertEqual(len(cell._compact_wrappers), wrappers + 1, "Wrapper with a synapse released.")
+        self.assertTrue(cell.dendrites[2]._references, "Synapse released.")
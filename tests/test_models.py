@@ -25,3 +25,7 @@ class TestGolgi(unittest.TestCase):
     def test_autorhythm(self):
         results = run_protocol("GolgiCell", "autorhythm", duration=300)
         self.assertEqual(results.Spikecount[0], 6, "Incorrect spike count.")
+
+    def test_mossy_fiber_input(self):
+        results = run_protocol("GolgiCell", "spike_train_input", synapse_type="AMPA_MF", label="basal_dendrites", duration=300)
+        self.assertGreater(results.Spikecount[0], 6, "Inputs did not increase the firing rate.")
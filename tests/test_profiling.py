@@ -0,0 +1,27 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import dbbs_models
+from dbbs_models.profiling import profile
+from dbbs_models.benchmark import model_statistics
+
+class TestProfiling(unittest.TestCase):
+
+    def test_granule_estimate(self):
+        cell = dbbs_models.GranuleCell()
+        rows = profile(cell, measure=False)
+        cable = sum(n for label, mechanism, n, cost in rows if mechanism == "cable")
+        self.assertEqual(cable, model_statistics(cell)["segments"], "Cable rows don't cover all segments.")
+        pairs = set((label, mechanism) for label, mechanism, n, cost in rows)
+        self.assertIn(("axon_initial_segment", "Na (granule_cell_FHF)"), pairs, "Missing AIS sodium.")
+
+    def test_granule_measure(self):
+        # Only the structure is tested, the ranking depends on the load of the machine.
+        cell = dbbs_models.GranuleCell()
+        rows = profile(cell, steps=10, repeats=1)
+        estimate = profile(cell, measure=False)
+        self.assertEqual(
+            sorted(row[:3] for row in rows), sorted(row[:3] for row in estimate),
+            "Measured rows differ from the estimated rows."
+        )
+        self.assertTrue(all(isinstance(cost, float) and cost >= 0 for label, mechanism, n, cost in rows), "Invalid cost.")
+        self.assertEqual([row[3] for row in rows], sorted((row[3] for row in rows), reverse=True), "Rows not ranked.")
@@ -0,0 +1,73 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy as np
+from runner import run_protocol
+
+def current_injection(name, amplitude, duration=200):
+    return {
+        "name": name,
+        "duration": duration,
+        "stimuli": [{"type": "IClamp", "label": "soma", "dur": duration, "amp": amplitude}],
+        "stim_start": 0,
+        "stim_end": duration,
+        "features": ["Spikecount"],
+    }
+
+class TestProtocolEngine(unittest.TestCase):
+    def test_granule_sequence(self):
+        # Each protocol must see a fresh cell: the stimuli of earlier protocols are
+        # removed and the state is reinitialized in between.
+        protocols = [
+            current_injection("10pA", 0.01),
+            {"name": "rest", "duration": 200, "features": ["Spikecount"]},
+            current_injection("10pA_again", 0.01),
+        ]
+        results = run_protocol("GranuleCell", "declarative", protocols=protocols)
+        self.assertEqual(results["10pA"]["Spikecount"][0], 9, "Incorrect spike count.")
+        self.assertEqual(results["rest"]["Spikecount"][0], 0, "Stimulus was not removed.")
+        self.assertEqual(results["10pA_again"]["Spikecount"][0], 9, "State was not reset.")
+
+    def test_golgi_autorhythm(self):
+        protocols = [
+            {"name": "autorhythm", "duration": 300, "features": ["Spikecount"]},
+            current_injection("hyperpolarized", -0.1, duration=300),
+            {"name": "autorhythm_again", "duration": 300, "features": ["Spikecount"]},
+        ]
+        results = run_protocol("GolgiCell", "declarative", protocols=protocols)
+        self.assertEqual(results["autorhythm"]["Spikecount"][0], 6, "Incorrect spike count.")
+        self.assertEqual(results["hyperpolarized"]["Spikecount"][0], 0, "Stimulus not applied.")
+        self.assertEqual(results["autorhythm_again"]["Spikecount"][0], 6, "State was not reset.")
+
+class TestSpikeTrainStimuli(unittest.TestCase):
+    def test_granule_ampa_nmda(self):
+        # Each stimulus must only drive its own synapses: adding NMDA inputs at 60 ms
+        # must leave the response to the AMPA inputs at 10 ms untouched.
+        import dbbs_models
+        from dbbs_models.protocols import run_protocols
+
+        ampa = {"type": "spike_trains", "synapse_type": "AMPA", "label": "dendrites", "n": 4, "times": [10] * 4, "ids": [0, 1, 2, 3]}
+        nmda = {"type": "spike_trains", "synapse_type": "NMDA", "label": "dendrites", "n": 4, "times": [60] * 4, "ids": [0, 1, 2, 3]}
+        cell = dbbs_models.GranuleCell()
+        cell.set_reference_id(0)
+        alone, both = run_protocols(cell, [
+            {"name": "ampa", "duration": 100, "stimuli": [ampa]},
+            {"name": "ampa_nmda", "duration": 100, "stimuli": [ampa, nmda]},
+        ])
+        t = np.array(both["time"])
+        alone, both = np.array(alone["recordings"]["Vm"]), np.array(both["recordings"]["Vm"])
+        self.assertGreater(alone[t < 60].max() - alone[0], 1, "AMPA inputs had no effect.")
+        self.assertTrue(np.allclose(alone[t < 60], both[t < 60]), "NMDA inputs reached the AMPA synapses.")
+        self.assertGreater(both[t > 60].max() - alone[t > 60].max(), 1, "NMDA inputs had no effect.")
+
+    def test_repeated_poisson(self):
+        # A stochastic protocol gives the same results on a reused cell.
+        import dbbs_models
+        from dbbs_models.protocols import run_protocols
+
+        poisson = {"type": "poisson", "synapse_type": "AMPA", "label": "dendrites", "n": 8, "rate": 100, "duration": 200}
+        protocol = {"name": "poisson", "duration": 200, "stimuli": [poisson], "features": ["Spikecount"]}
+        cell = dbbs_models.GranuleCell()
+        cell.set_reference_id(0)
+        first, second = run_protocols(cell, [protocol, protocol])
+        self.assertGreater(first["features"]["Spikecount"][0], 0, "Inputs did not make the cell fire.")
+        self.assertTrue(np.array_equal(first["recordings"]["Vm"], second["recordings"]["Vm"]), "Second run differs.")
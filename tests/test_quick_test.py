@@ -0,0 +1,49 @@
+import os, sys, tempfile, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy as np
+import dbbs_models
+from dbbs_models.test import quick_test, _minmax_buckets
+
+class TestMinMaxBuckets(unittest.TestCase):
+
+    def test_extrema(self):
+        t = np.arange(0, 10, 0.025)
+        v = np.sin(3 * t) + np.cos(7 * t)
+        keep = _minmax_buckets(t, v, 0.5)
+        self.assertTrue(np.all(np.diff(keep) > 0), "Samples not in time order.")
+        for bucket in np.unique(np.floor(t / 0.5)):
+            kept = v[keep][np.floor(t[keep] / 0.5) == bucket]
+            in_bucket = v[np.floor(t / 0.5) == bucket]
+            self.assertEqual((kept.min(), kept.max()), (in_bucket.min(), in_bucket.max()), "Bucket extrema lost.")
+
+    def test_constant(self):
+        t = np.arange(0, 1, 0.025)
+        keep = _minmax_buckets(t, np.zeros(len(t)), 0.5)
+        self.assertEqual(len(keep), 2, "Flat buckets should keep a single sample.")
+
+class TestQuickTest(unittest.TestCase):
+
+    def test_chunked_file(self):
+        from patch import p
+
+        cell = dbbs_models.GolgiCell()
+        # Full resolution recordings, that `quick_test` does not clear.
+        v = p.Vector()
+        v.record(cell.soma[0].__neuron__()(0.5)._ref_v)
+        t = p.Vector()
+        t.record(p._ref_t)
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "golgi.html")
+            figure = quick_test(cell, duration=60, points=200, file=file, chunk=10)
+            self.assertGreater(os.path.getsize(file), 0, "Figure not written.")
+        x, y = np.array(figure.data[0].x), np.array(figure.data[0].y)
+        t, v = np.array(t), np.array(v)
+        self.assertTrue(np.all(np.diff(x) >= 0), "Times not monotonic across chunks.")
+        self.assertLess(len(x), len(t) / 5, "Trace not downsampled.")
+        # `quick_test` rounds the chunks to whole buckets of 60 / (200 // 2) ms.
+        width = 0.6
+        for bucket in np.unique(np.floor(t / width)):
+            kept = y[np.floor(x / width) == bucket]
+            full = v[np.floor(t / width) == bucket]
+            self.assertEqual((kept.min(), kept.max()), (full.min(), full.max()), "Bucket extrema lost.")
+        self.assertGreater(y.max(), 0, "Spike peaks lost.")
@@ -0,0 +1,31 @@
+import os, sys, copy, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import dbbs_models
+from runner import run_protocol
+from dbbs_models.regression import ReferenceStore, compare_reference
+from dbbs_models.updates import update_section_types
+
+store = ReferenceStore(os.path.join(os.path.dirname(__file__), "golden"))
+
+class TestGoldenTraces(unittest.TestCase):
+    def test_references(self):
+        for model_name, protocol_name in store:
+            with self.subTest(model=model_name, protocol=protocol_name):
+                reference = store.load(model_name, protocol_name)
+                result = run_protocol(
+                    model_name,
+                    "golden",
+                    protocol=reference["protocol"],
+                    reference=reference["spike_times"],
+                )
+                self.assertTrue(result["passed"], result["message"])
+
+    def test_early_abort(self):
+        reference = store.load("GranuleCell", "soma_current_injection")
+        cell = dbbs_models.GranuleCell()
+        soma = copy.deepcopy(cell.section_types["soma"])
+        soma["attributes"][("gmax", "Leak")] *= 3
+        update_section_types(cell, {"soma": soma})
+        result = compare_reference(cell, reference["protocol"], reference["spike_times"])
+        self.assertFalse(result["passed"], "Changed model should diverge.")
+        self.assertLess(result["time"], reference["protocol"]["duration"], "Run was not aborted early.")
@@ -0,0 +1,111 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy as np
+from patch import p
+from neuron import h
+import dbbs_models
+from dbbs_models.stimulation import SpikeTrains
+from dbbs_models.streams import set_seed, poisson_train, stream_ids
+
+def input_trains(inputs, group):
+    # Spike times of each input of a group, from the vectors played by the PatternStim.
+    times, ids = (np.array(v) for v in inputs._vectors)
+    return [times[ids == gid] for gid in group.gids]
+
+def granule_spikes(cells, rate=60, duration=200):
+    inputs = SpikeTrains()
+    for cell in cells:
+        inputs.add_poisson(cell, "AMPA", cell.dendrites, rate, duration)
+    spikes = p.Vector()
+    netcon = p.NetCon(cells[-1].soma[0].__neuron__()(0.5)._ref_v, None, sec=cells[-1].soma[0].__neuron__())
+    netcon.threshold = -20
+    netcon.record(spikes)
+    p.cvode.active(0)
+    p.finitialize(-70)
+    p.continuerun(duration)
+    return np.array(spikes)
+
+class TestStreams(unittest.TestCase):
+    def setUp(self):
+        set_seed(0)
+
+    def test_poisson_train(self):
+        forward = [poisson_train(50, 1000, 7, i) for i in range(10)]
+        interleaved = []
+        for i in reversed(range(10)):
+            poisson_train(50, 1000, 8, i)
+            interleaved.insert(0, poisson_train(50, 1000, 7, i))
+        for a, b in zip(forward, interleaved):
+            self.assertTrue(np.array_equal(a, b), "Stream depends on draw order.")
+        self.assertFalse(np.array_equal(forward[0], forward[1]), "Streams are not independent.")
+        counts = [len(poisson_train(50, 1000, 7, i)) for i in range(200)]
+        self.assertAlmostEqual(np.mean(counts), 50, delta=2)
+        set_seed(1)
+        self.assertFalse(np.array_equal(forward[0], poisson_train(50, 1000, 7, 0)), "Seed is not used.")
+        with self.assertRaises(ValueError):
+            stream_ids(-1)
+
+    def test_spike_train_inputs(self):
+        cell = dbbs_models.GranuleCell()
+        cell.set_reference_id(3)
+        inputs = SpikeTrains()
+        group = inputs.add_poisson(cell, "AMPA", cell.dendrites, 50, 500)
+        expected = [poisson_train(50, 500, 3, i) for i in range(len(cell.dendrites))]
+        for train, reference in zip(input_trains(inputs, group), expected):
+            self.assertTrue(np.array_equal(train, reference))
+
+    def test_rank_independence(self):
+        # The spikes of a cell must not depend on the other cells simulated with it.
+        alone = dbbs_models.GranuleCell()
+        alone.set_reference_id(2)
+        spikes_alone = granule_spikes([alone])
+        del alone
+        other = dbbs_models.GranuleCell()
+        other.set_reference_id(1)
+        cell = dbbs_models.GranuleCell()
+        cell.set_reference_id(2)
+        spikes_shared = granule_spikes([other, cell])
+        self.assertGreater(len(spikes_alone), 0, "Inputs did not make the cell fire.")
+        self.assertTrue(np.array_equal(spikes_alone, spikes_shared), "Spikes depend on the other cells.")
+
+    def test_separate_collections(self):
+        # The inputs of two collections must each reach only their own synapses.
+        cell = dbbs_models.GranuleCell()
+        cell.set_reference_id(0)
+        inputs = SpikeTrains(), SpikeTrains()
+        ampa = inputs[0].add(cell, "AMPA", [cell.dendrites[0]], [10.], [0])
+        nmda = inputs[1].add(cell, "NMDA", [cell.dendrites[1]], [30.], [0])
+        self.assertNotEqual(ampa.gids[0], nmda.gids[0], "Collections share an input gid.")
+        received = [h.Vector(), h.Vector()]
+        for group, vector in zip((ampa, nmda), received):
+            group.netcons[0].record(vector)
+        p.cvode.active(0)
+        p.finitialize(-70)
+        p.continuerun(50)
+        self.assertEqual(list(received[0]), [10.], "AMPA synapse received the wrong events.")
+        self.assertEqual(list(received[1]), [30.], "NMDA synapse received the wrong events.")
+
+    def test_synapse_indices(self):
+        # Synapse indices, and so streams, are counted per model over all collections.
+        cell = dbbs_models.GranuleCell()
+        with self.assertRaises(ValueError):
+            SpikeTrains().add_poisson(cell, "AMPA", cell.dendrites, 50, 500)
+        cell.set_reference_id(4)
+        inputs = SpikeTrains(), SpikeTrains()
+        first = inputs[0].add_poisson(cell, "AMPA", cell.dendrites[:1], 50, 500)
+        second = inputs[1].add_poisson(cell, "NMDA", cell.dendrites[:1], 50, 500)
+        self.assertTrue(np.array_equal(input_trains(inputs[0], first)[0], poisson_train(50, 500, 4, 0)))
+        self.assertTrue(np.array_equal(input_trains(inputs[1], second)[0], poisson_train(50, 500, 4, 1)))
+
+    def test_released_indices(self):
+        # A collection releases its synapse indices, so the same inputs draw the same
+        # streams again.
+        cell = dbbs_models.GranuleCell()
+        cell.set_reference_id(5)
+        inputs = SpikeTrains()
+        first = input_trains(inputs, inputs.add_poisson(cell, "AMPA", cell.dendrites[:2], 50, 500))
+        del inputs
+        inputs = SpikeTrains()
+        again = input_trains(inputs, inputs.add_poisson(cell, "AMPA", cell.dendrites[:2], 50, 500))
+        for a, b in zip(first, again):
+            self.assertTrue(np.array_equal(a, b), "Released indices not reused.")
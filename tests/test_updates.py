@@ -0,0 +1,70 @@
+import os, sys, copy, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from neuron import h
+import dbbs_models
+from dbbs_models.memory import compact
+from dbbs_models.updates import update_section_types
+
+def section_state(model):
+    # The section properties, the PARAMETER values of the mechanisms and the reversal
+    # potentials of the ions of each section.
+    state = []
+    for section in model.sections:
+        nrn_section = section.__neuron__()
+        parameters = []
+        for segment in nrn_section:
+            for ion in ("na", "k", "ca", "h"):
+                if nrn_section.has_membrane(ion + "_ion"):
+                    parameters.append(("e" + ion, getattr(segment, "e" + ion)))
+            for mechanism in segment:
+                if mechanism.is_ion():
+                    continue
+                standard = h.MechanismStandard(mechanism.name(), 1)
+                getattr(standard, "in")(segment)
+                name = h.ref("")
+                for i in range(int(standard.count())):
+                    standard.name(name, i)
+                    parameters.append((name[0], standard.get(name[0])))
+        state.append((tuple(section.labels), nrn_section.Ra, nrn_section.cm, sorted(parameters)))
+    return state
+
+class TestUpdates(unittest.TestCase):
+    def test_golgi_axon_initial_segment(self):
+        definition = copy.deepcopy(dbbs_models.GolgiCell.section_types["axon_initial_segment"])
+        definition["mechanisms"].remove("Km")
+        del definition["attributes"][("gkbar", "Km")]
+        definition["attributes"][("gbar", "HCN1")] *= 2
+        definition["attributes"]["Ra"] = 150
+        cell = dbbs_models.GolgiCell()
+        before = section_state(cell)
+        updated = update_section_types(cell, {"axon_initial_segment": definition})
+        self.assertEqual(updated, 1, "Only the axon initial segment should be updated.")
+        section_types = dict(dbbs_models.GolgiCell.section_types, axon_initial_segment=definition)
+        expected = type("GolgiCellUpdated", (dbbs_models.GolgiCell,), {"section_types": section_types})()
+        after = section_state(cell)
+        self.assertEqual(after, section_state(expected), "Update differs from a rebuild.")
+        self.assertEqual(sum(a != b for a, b in zip(before, after)), 1)
+        self.assertIs(cell.section_types["axon_initial_segment"], definition)
+        self.assertIsNot(dbbs_models.GolgiCell.section_types["axon_initial_segment"], definition)
+
+    def test_granule_sodium_dendrites(self):
+        definition = copy.deepcopy(dbbs_models.GranuleCell.section_types["dendrites"])
+        definition["mechanisms"].append(("Na", "granule_cell"))
+        definition["attributes"]["ena"] = 87.39
+        cell = dbbs_models.GranuleCell()
+        update_section_types(cell, {"dendrites": definition})
+        section_types = dict(dbbs_models.GranuleCell.section_types, dendrites=definition)
+        expected = type("GranuleCellUpdated", (dbbs_models.GranuleCell,), {"section_types": section_types})()
+        self.assertEqual(section_state(cell), section_state(expected), "Update differs from a rebuild.")
+        self.assertEqual(cell.dendrites[0].__neuron__().ena, 87.39, "Sodium reversal potential not set.")
+
+    def test_compact_granule(self):
+        definition = copy.deepcopy(dbbs_models.GranuleCell.section_types["dendrites"])
+        definition["attributes"][("gmax", "Leak")] = 0.001
+        cell = compact(dbbs_models.GranuleCell())
+        wrappers = len(cell._compact_wrappers)
+        updated = update_section_types(cell, {"dendrites": definition})
+        self.assertEqual(updated, len(cell.dendrites))
+        self.assertEqual(len(cell._compact_wrappers), wrappers, "Update created section wrappers.")
+        leak = [m for m in cell.dendrites[0].__neuron__().psection()["density_mechs"] if "Leak" in m][0]
+        self.assertEqual(getattr(cell.dendrites[0].__neuron__(), "gmax_" + leak), 0.001)
@@ -0,0 +1,45 @@
+import os, sys, pickle, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import dbbs_models
+from dbbs_models.test import SimpleCell
+from dbbs_models.variants import derive, get_variant, compile_definition
+from test_updates import section_state
+
+class TestVariants(unittest.TestCase):
+    def test_simple_cell(self):
+        cell = SimpleCell()
+        self.assertIs(get_variant("SimpleCell"), SimpleCell)
+        self.assertEqual(len(cell.sections), 1)
+        self.assertEqual(cell.soma[0].__neuron__().cm, 2)
+        point_process = SimpleCell.synapse_types["AMPA"]["point_process"]
+        self.assertEqual(point_process, ('AMPA', 'granule_cell_deterministic'))
+        self.assertEqual(SimpleCell.synapse_types["AMPA"]["attributes"]["gmax"], 1200)
+        self.assertEqual(list(SimpleCell.section_types), ["soma"])
+        self.assertEqual(SimpleCell.__module__, "dbbs_models.test.validation_models")
+        self.assertIs(pickle.loads(pickle.dumps(SimpleCell)), SimpleCell)
+
+    def test_overrides(self):
+        leaky = derive(
+            dbbs_models.GranuleCell,
+            "LeakyGranuleCell",
+            section_types={"soma": {"attributes": {("gmax", "Leak"): 0.001}}},
+            register=False,
+        )
+        self.assertEqual(dbbs_models.GranuleCell.section_types["soma"]["attributes"][("gmax", "Leak")], 0.00029038073716)
+        cell = leaky()
+        soma = cell.soma[0].__neuron__()
+        self.assertEqual(getattr(soma, "gmax_" + compile_definition(leaky, ["soma"]).mechanisms[0]), 0.001)
+        self.assertEqual(soma.cm, 2, "Attributes that are not overridden should be kept.")
+
+    def test_shared_definitions(self):
+        a = derive(dbbs_models.GranuleCell, "GranuleA", section_types={"soma": {"attributes": {"cm": 1}}}, register=False)
+        b = derive(dbbs_models.GranuleCell, "GranuleB", section_types={"soma": {"attributes": {"cm": 3}}}, register=False)
+        self.assertIs(compile_definition(a, ["dendrites"]), compile_definition(b, ["dendrites"]))
+        self.assertIsNot(compile_definition(a, ["soma"]), compile_definition(b, ["soma"]))
+
+    def test_build_parity(self):
+        # The compiled build must create the same sections as arborize.
+        for model in (dbbs_models.GranuleCell, dbbs_models.GolgiCell, dbbs_models.BasketCell, dbbs_models.StellateCell):
+            with self.subTest(model=model.__name__):
+                variant = derive(model, "Compiled" + model.__name__, register=False)
+                self.assertEqual(section_state(variant()), section_state(model()), "Compiled build differs.")
@@ -0,0 +1,35 @@
+"""
+    Record the reference spike times that ``test_regression`` compares against.
+
+    Usage:
+      python tests/update_golden.py [model_name protocol_name]
+"""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from runner import run_protocol
+from dbbs_models.regression import ReferenceStore
+
+store = ReferenceStore(os.path.join(os.path.dirname(__file__), "golden"))
+
+protocols = {
+    "GranuleCell": [
+        {
+            "name": "soma_current_injection",
+            "duration": 200,
+            "stimuli": [{"type": "IClamp", "label": "soma", "dur": 200, "amp": 0.01}],
+        },
+    ],
+    "GolgiCell": [
+        {"name": "autorhythm", "duration": 300},
+    ],
+}
+
+if __name__ == "__main__":
+    only = sys.argv[1:3]
+    for model_name, model_protocols in protocols.items():
+        for protocol in model_protocols:
+            if only and only != [model_name, protocol["name"]]:
+                continue
+            results = run_protocol(model_name, "golden", protocol=protocol)
+            store.save(model_name, protocol, results["spike_times"])
+            print(model_name, protocol["name"], len(results["spike_times"]), "spikes")